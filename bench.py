@@ -0,0 +1,112 @@
+from datetime import datetime
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+"""
+- benchmark classes are discovered like test cases; any class whose name ends with `Benchmark` is collected, and each `bench_` method is timed
+- classes may define `params`, in which case `setUp(param)` is called once per param before timing
+- `measure_` methods return a size in bytes rather than being timed, and are compared in the same way
+"""
+
+def find_benchmarks(root_dirs):
+    benchmarks = []
+    for root_dir in root_dirs:
+        for root, _, files in os.walk(root_dir):
+            for file in sorted(files):
+                if file.endswith('.py'):
+                    full_path = os.path.join(root, file)
+                    module_name = full_path.replace(os.sep, '.')[:-3]
+                    module = __import__(module_name, fromlist=[''])
+                    for name in dir(module):
+                        obj = getattr(module, name)
+                        if (isinstance(obj, type) and
+                            name.endswith("Benchmark") and
+                            obj.__module__ == module.__name__):
+                            benchmarks.append(obj)
+    return benchmarks
+
+def time_fn(fn, repeat):
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {"min": min(timings),
+            "mean": statistics.mean(timings),
+            "repeat": repeat}
+
+def run_benchmarks(benchmarks, repeat, pattern = None):
+    results = {}
+    for klass in benchmarks:
+        methods = [name for name in dir(klass) if name.startswith(("bench_", "measure_"))]
+        for param in getattr(klass, "params", [None]):
+            names = [f"{klass.__name__}.{method}" + (f"[{param}]" if param is not None else "")
+                     for method in methods]
+            if pattern and not any(pattern in name for name in names):
+                continue
+            instance = klass()
+            if hasattr(instance, "setUp"):
+                instance.setUp(param) if param is not None else instance.setUp()
+            try:
+                for name, method in zip(names, methods):
+                    if pattern and pattern not in name:
+                        continue
+                    if method.startswith("measure_"):
+                        results[name] = {"bytes": getattr(instance, method)()}
+                        print(f"{name}: {results[name]['bytes']} bytes")
+                    else:
+                        results[name] = time_fn(getattr(instance, method), repeat)
+                        print(f"{name}: {results[name]['min']:.6f}s")
+            finally:
+                if hasattr(instance, "tearDown"):
+                    instance.tearDown()
+    return results
+
+def compare_results(results, previous, threshold):
+    regressions = []
+    for name, result in results.items():
+        if name in previous:
+            metric = "bytes" if "bytes" in result else "min"
+            ratio = result[metric] / previous[name][metric] if previous[name][metric] else 1
+            flag = "REGRESSION" if ratio > 1 + threshold else ""
+            print(f"{name}: {ratio:.2f}x {flag}")
+            if flag:
+                regressions.append(name)
+    return regressions
+
+def parse_args(default_repeat = 5,
+               default_threshold = 0.2):
+    parser = argparse.ArgumentParser(description="Run euclid09 benchmarks.")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this string.")
+    parser.add_argument("--repeat", type=int, default=default_repeat, help=f"Timed runs per benchmark (default: {default_repeat}).")
+    parser.add_argument("--output", help="JSON file to write results to (default: tmp/bench/<timestamp>.json).")
+    parser.add_argument("--compare", help="JSON results file from a previous run to compare against.")
+    parser.add_argument("--threshold", type=float, default=default_threshold, help=f"Slowdown ratio above which a benchmark is flagged (default: {default_threshold}).")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = run_benchmarks(find_benchmarks(["benchmarks"]),
+                             repeat = args.repeat,
+                             pattern = args.filter)
+    timestamp = datetime.utcnow().strftime("%Y-%m-%d-%H-%M-%S")
+    output = args.output if args.output else f"tmp/bench/{timestamp}.json"
+    if os.path.dirname(output) and not os.path.exists(os.path.dirname(output)):
+        os.makedirs(os.path.dirname(output))
+    with open(output, "w") as file:
+        file.write(json.dumps({"timestamp": timestamp,
+                               "python": platform.python_version(),
+                               "results": results}, indent=2))
+    print(f"\nWrote {output}")
+    if args.compare:
+        with open(args.compare) as file:
+            previous = json.load(file)["results"]
+        print()
+        if compare_results(results, previous, args.threshold):
+            sys.exit(1)
@@ -0,0 +1,46 @@
+from benchmarks.stubs import StubMachine, StubSound
+
+from euclid09.catalogue import bjorklund_mask
+from euclid09.generators import Beat
+
+from unittest.mock import patch
+
+import random
+
+"""
+- `beat` times Beat as rendered, which takes the numpy- batched path for long renders when numpy is installed; `beat_streaming` forces the per- tick loop, so the two can be compared at each n_ticks
+"""
+
+class BeatBenchmark:
+
+    params = [64, 4096, 65536]
+
+    def setUp(self, n_ticks):
+        self.n_ticks = n_ticks
+        self.pattern = bjorklund_mask(pulses = 5, steps = 16)
+        self.sounds = [StubSound("bank", f"{i}.wav") for i in range(2)]
+
+    def render(self):
+        rand = {key: random.Random(i) for i, key in enumerate(["volume", "sound", "beat"])}
+        machine = StubMachine(container = None,
+                              namespace = "Mid",
+                              colour = None,
+                              sounds = self.sounds)
+        for _ in Beat(machine, self.n_ticks, rand,
+                      pattern = self.pattern,
+                      groove = lambda rand, i: 0.9 + 0.1 * rand.random(),
+                      temperature = 0.5,
+                      density = 0.5,
+                      dry_level = 1,
+                      tpb = 1):
+            pass
+
+    def bench_beat(self):
+        self.render()
+
+    def bench_beat_streaming(self):
+        with patch("euclid09.generators.np", None):
+            self.render()
+
+if __name__ == "__main__":
+    pass
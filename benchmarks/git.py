@@ -0,0 +1,82 @@
+from benchmarks.stubs import random_project
+
+from euclid09.git import Codecs, Git, DirStore, LogStore, SharedStore, decode_struct
+from euclid09.model import Project
+
+from datetime import datetime, timedelta
+
+import os
+import shutil
+
+"""
+- synthetic histories are chains of single- track mutations, which is what the cli mostly commits
+- keys are written directly to the stores, since CommitId.randomise() only has second resolution
+"""
+
+def commit_keys(n, start = datetime(2024, 1, 1)):
+    for i in range(n):
+        timestamp = (start + timedelta(seconds = i)).strftime("%Y-%m-%d-%H-%M-%S")
+        yield f"{timestamp}-bench-{i:06d}"
+
+class GitBenchmark:
+
+    params = [10, 1000, 10000]
+
+    def setUp(self, n_commits, n_patches = 4):
+        self.roots = {name: f"tmp/bench/git-{name}-{n_commits}"
+                      for name in ["dir", "log"]}
+        for root in self.roots.values():
+            if os.path.exists(root):
+                shutil.rmtree(root)
+        stores = [SharedStore(DirStore(self.roots["dir"])),
+                  SharedStore(LogStore(self.roots["log"]))]
+        project = random_project(n_patches = n_patches)
+        for key in commit_keys(n_commits):
+            project = project.clone()
+            project.patches[0].mutate_attr(attr = "seeds")
+            struct = project.to_json()
+            for store in stores:
+                store.put(key, struct)
+
+    def tearDown(self):
+        for root in self.roots.values():
+            shutil.rmtree(root)
+
+    def fetch(self, store_class):
+        root = self.roots[store_class.__name__.replace("Store", "").lower()]
+        git = Git(root, store = SharedStore(store_class(root)))
+        git.fetch()
+        return git
+
+    def bench_fetch_dir(self):
+        self.fetch(DirStore)
+
+    def bench_fetch_log(self):
+        self.fetch(LogStore)
+
+    def bench_fetch_head_dir(self):
+        self.fetch(DirStore).head.content
+
+    def bench_fetch_head_log(self):
+        self.fetch(LogStore).head.content
+
+class CodecBenchmark:
+
+    params = list(Codecs.keys())
+
+    def setUp(self, codec_name, n_patches = 16):
+        self.codec = Codecs[codec_name]()
+        self.struct = random_project(n_patches = n_patches).to_json()
+        self.data = self.codec.encode(self.struct)
+
+    def bench_encode(self):
+        self.codec.encode(self.struct)
+
+    def bench_decode(self):
+        decode_struct(self.data)
+
+    def bench_load(self):
+        Project.from_json(decode_struct(self.data))
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,62 @@
+from benchmarks.stubs import StubContainer, Tracks, random_project, random_sounds
+
+from euclid09.generators import Beat, GhostEcho
+from euclid09.model import Patches, Project, RenderCache
+
+from unittest.mock import patch
+
+import json
+import tracemalloc
+
+class ModelBenchmark:
+
+    params = [16, 128]
+
+    def setUp(self, n_patches):
+        self.n_patches = n_patches
+        self.sounds = random_sounds()
+        self.project = random_project(n_patches = n_patches)
+        self.project_json = json.loads(json.dumps(self.project.to_json()))
+        self.cache = RenderCache()
+        self.render(cache = self.cache)
+
+    def render(self, n_ticks = 64, cache = None):
+        with patch("euclid09.model.SVContainer", StubContainer):
+            return self.project.render(banks = None,
+                                       generators = [Beat, GhostEcho],
+                                       bpm = 120,
+                                       tpb = 1,
+                                       n_ticks = n_ticks,
+                                       cache = cache)
+
+    def bench_randomise(self):
+        Patches.randomise(tracks = Tracks,
+                          sounds = self.sounds,
+                          n_patches = self.n_patches,
+                          n_sounds = 2)
+
+    def bench_clone(self):
+        self.project.clone()
+
+    def bench_to_json(self):
+        self.project.to_json()
+
+    def bench_from_json(self):
+        Project.from_json(self.project_json)
+
+    def bench_render(self):
+        self.render()
+
+    def bench_render_cached(self):
+        self.render(cache = self.cache)
+
+    def measure_loaded_commits(self, n_commits = 100):
+        tracemalloc.start()
+        projects = [Project.from_json(self.project_json)
+                    for i in range(n_commits)]
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return size
+
+if __name__ == "__main__":
+    pass
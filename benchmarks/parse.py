@@ -0,0 +1,23 @@
+from euclid09.parse import is_abbrev
+
+"""
+- `words` times matching across many short words; `word` is the worst case for a backtracking matcher, a single long word containing many candidate positions for each abbreviation character, with a final character which never matches
+- abbreviations have a fixed length, so both should scale linearly with the length of the text
+"""
+
+class IsAbbrevBenchmark:
+
+    params = [8, 32, 128, 512]
+
+    def setUp(self, n):
+        self.words = (" ".join(["snare clap"] * n), "sc" * 8)
+        self.word = ("kickbass" * n, "kb" * 8 + "x")
+
+    def bench_words(self):
+        is_abbrev(self.words[1], self.words[0])
+
+    def bench_word(self):
+        is_abbrev(self.word[1], self.word[0])
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,94 @@
+from euclid09.model import Project
+
+import random
+
+"""
+- a minimal container, machine and sound, so that model rendering can be timed without sunvox
+- StubMachine implements the note/modulation/toggle_sound interface which the generators call
+"""
+
+class StubContainer:
+
+    def __init__(self, banks, bpm, tpb, n_ticks):
+        self.banks = banks
+        self.bpm = bpm
+        self.tpb = tpb
+        self.n_ticks = n_ticks
+        self.patches = []
+        self.machines = []
+
+    def spawn_patch(self, colour):
+        self.patches.append([])
+
+    def add_machine(self, machine):
+        self.machines.append(machine)
+
+    def add_trigs(self, i, trig_block):
+        self.patches[-1].append((i, trig_block))
+
+class StubSound:
+
+    def __init__(self, bank_name, file_path, note = 0, tags = None, cutoff = None):
+        self.bank_name = bank_name
+        self.file_path = file_path
+        self.note = note
+        self.tags = tags if tags else []
+        self.cutoff = cutoff
+
+    def clone(self):
+        return StubSound(**self.as_dict())
+
+    def as_dict(self):
+        return {"bank_name": self.bank_name,
+                "file_path": self.file_path,
+                "note": self.note,
+                "tags": list(self.tags),
+                "cutoff": self.cutoff}
+
+class StubMachine:
+
+    def __init__(self, container, namespace, colour, sounds):
+        self.container = container
+        self.namespace = namespace
+        self.colour = colour
+        self.sounds = sounds
+        self.sound_index = 0
+
+    def toggle_sound(self):
+        self.sound_index = 1 - self.sound_index
+
+    def note(self, volume, level):
+        sound = self.sounds[self.sound_index % len(self.sounds)]
+        return [(self.namespace, sound.file_path, volume * level)]
+
+    def modulation(self, level, **kwargs):
+        return [(self.namespace, level, kwargs)]
+
+    def render(self, generator, seeds, env):
+        rand = {key: random.Random(seed) for key, seed in seeds.items()}
+        for i, trig_block in generator(self,
+                                       n = self.container.n_ticks,
+                                       rand = rand,
+                                       **env):
+            self.container.add_trigs(i, trig_block)
+
+Tracks = [{"name": name,
+           "machine": "benchmarks.stubs.StubMachine",
+           "temperature": temperature,
+           "density": temperature}
+          for name, temperature in [("mid", 0.5), ("lo", 0.25), ("hi", 0.75)]]
+
+def random_sounds(tracks = Tracks, n = 16):
+    return {track["name"]: [StubSound(bank_name = "bench",
+                                      file_path = f"{track['name']}/{i}.wav")
+                            for i in range(n)]
+            for track in tracks}
+
+def random_project(n_patches = 16, tracks = Tracks):
+    return Project.randomise(tracks = tracks,
+                             sounds = random_sounds(tracks),
+                             n_patches = n_patches,
+                             n_sounds = 2)
+
+if __name__ == "__main__":
+    pass
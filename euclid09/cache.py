@@ -0,0 +1,25 @@
+from collections import OrderedDict
+
+class LRUCache(OrderedDict):
+
+    def __init__(self, maxsize = 64):
+        OrderedDict.__init__(self)
+        self.maxsize = maxsize
+
+    def fetch(self, key, loader):
+        if key in self:
+            self.move_to_end(key)
+            return self[key]
+        value = self[key] = loader()
+        if len(self) > self.maxsize:
+            self.popitem(last = False)
+        return value
+
+    def put(self, key, value):
+        self[key] = value
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last = False)
+
+if __name__ == "__main__":
+    pass
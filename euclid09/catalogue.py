@@ -0,0 +1,35 @@
+import sv.algos.euclid as euclid
+import sv.algos.groove.perkons as perkons
+
+import inspect
+
+"""
+- the perkons groove table and the bjorklund masks for every tidal (pulses, steps) pair are built once, at import, rather than rediscovered or recomputed on the randomise and render paths
+- a Mask holds one byte per step and is callable with a tick index, so it can be passed to the generators wherever a bjorklund pattern function was; like the euclidean cycle it encodes, it wraps modulo its length
+- GrooveNames keeps the (alphabetical) order of inspect.getmembers, and TidalPatterns the order of euclid.TidalPatterns, so seeded choices from either are unchanged
+"""
+
+class Mask(bytes):
+
+    def __call__(self, i):
+        return self[i % len(self)]
+
+def build_mask(pulses, steps):
+    pattern = euclid.bjorklund(pulses = pulses, steps = steps)
+    return Mask(int(bool(pattern(i))) for i in range(steps))
+
+GrooveFunctions = dict(inspect.getmembers(perkons, inspect.isfunction))
+
+GrooveNames = tuple(GrooveFunctions.keys())
+
+TidalPatterns = tuple(tuple(pattern) for pattern in euclid.TidalPatterns)
+
+Masks = {pattern[:2]: build_mask(*pattern[:2]) for pattern in TidalPatterns}
+
+def bjorklund_mask(pulses, steps):
+    if (pulses, steps) not in Masks:
+        Masks[(pulses, steps)] = build_mask(pulses, steps)
+    return Masks[(pulses, steps)]
+
+if __name__ == "__main__":
+    pass
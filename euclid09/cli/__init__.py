@@ -1,13 +1,18 @@
-from sv.utils.export import export_wav
-
+from euclid09.cli.batch import interactive, load_script, run_script
+from euclid09.cli.export import Compression, StemCache, export_stems, stem_key, write_stem
 from euclid09.cli.levels import Levels
+from euclid09.cli.mixdown import mixdown_stems, pcm_error
+from euclid09.cli.population import Population
 from euclid09.cli.sounds import Sounds
 from euclid09.colours import Colours
+from euclid09.fitness import rank_patches
 from euclid09.generators import Beat, GhostEcho
-from euclid09.git import Git
-from euclid09.model import Project
+from euclid09.git import Codecs, Git, DirStore, SharedStore, Stores, migrate_store
+from euclid09.model import Patches, Project, RenderCache, content_hash
 from euclid09.parse import parse_line
+from euclid09.registry import validate_tracks
 
+from contextlib import closing
 from functools import wraps
 
 import argparse
@@ -41,18 +46,13 @@ def commit_and_render(fn):
     @wraps(fn)
     def wrapped(self, *args, **kwargs):
         project = fn(self, *args, **kwargs)
-        colours = Colours.randomise(tracks = self.tracks,
-                                    patches = project.patches)
-        container = project.render(banks = self.sounds.banks,
-                                   generators = self.generators,
-                                   colours = colours,
-                                   bpm = self.bpm,
-                                   tpb = self.tpb,
-                                   n_ticks = self.n_ticks)
-        commit_id = self.git.commit(project)
-        if not os.path.exists("tmp/sunvox"):
-            os.makedirs("tmp/sunvox")
-        container.write_project(f"tmp/sunvox/{commit_id}.sunvox")
+        if self.defer:
+            commit_id = self.git.commit(project)
+            self.deferred_renders.append((commit_id, project))
+        else:
+            container = self.render_project(project)
+            commit_id = self.git.commit(project)
+            self.write_project(container, commit_id)
     return wrapped
            
 class Euclid09CLI(cmd.Cmd):
@@ -60,7 +60,7 @@ class Euclid09CLI(cmd.Cmd):
     prompt = ">>> "
     intro = "Welcome to the Euclid09 CLI ;)"
 
-    def __init__(self, tracks, sounds, generators, bpm, tpb, n_patches, n_ticks):
+    def __init__(self, tracks, sounds, generators, bpm, tpb, n_patches, n_ticks, n_jobs = 1, store = "dir", codec = "json", defer = False, cutoff = None, seed = None, compression = "deflated", export_mode = "render", verify = False, tolerance = 1e-3):
         super().__init__()
         self.tracks = tracks
         self.sounds = sounds
@@ -69,7 +69,50 @@ class Euclid09CLI(cmd.Cmd):
         self.tpb = tpb
         self.n_patches = n_patches
         self.n_ticks = n_ticks
-        self.git = Git("tmp/git")
+        self.n_jobs = n_jobs
+        self.store = store
+        self.codec = codec
+        self.git = self.init_git()
+        self.cutoff = cutoff
+        self.compression = compression
+        self.export_mode = export_mode
+        self.verify = verify
+        self.tolerance = tolerance
+        self.rand = random.Random(seed)
+        self.colour_rand = random.Random(f"colours-{seed}" if seed is not None else None)
+        self.render_cache = RenderCache()
+        self.stem_cache = StemCache("tmp/stems")
+        self.defer = defer
+        self.deferred_renders = []
+        self.deferred_exports = []
+
+    def init_git(self, root = "tmp/git"):
+        return Git(root, store = SharedStore(Stores[self.store](root, codec = Codecs[self.codec]())))
+
+    def render_project(self, project):
+        colours = Colours.randomise(tracks = self.tracks,
+                                    patches = project.patches,
+                                    rand = self.colour_rand)
+        return project.render(banks = self.sounds.banks,
+                              generators = self.generators,
+                              colours = colours,
+                              bpm = self.bpm,
+                              tpb = self.tpb,
+                              n_ticks = self.n_ticks,
+                              cache = self.render_cache)
+
+    def write_project(self, container, commit_id):
+        if not os.path.exists("tmp/sunvox"):
+            os.makedirs("tmp/sunvox")
+        container.write_project(f"tmp/sunvox/{commit_id}.sunvox")
+
+    def flush(self):
+        for commit_id, project in self.deferred_renders:
+            self.write_project(self.render_project(project), commit_id)
+        for commit in self.deferred_exports:
+            self.export_commit(commit)
+        self.deferred_renders.clear()
+        self.deferred_exports.clear()
 
     def preloop(self):
         logging.info("Fetching commits ...")
@@ -80,7 +123,7 @@ class Euclid09CLI(cmd.Cmd):
     
     def do_randomise_mapping(self, _):
         """Randomise the mapping associated with tracks."""
-        self.sounds.randomise_mapping()
+        self.sounds.randomise_mapping(rand = self.rand)
         logging.info(self.sounds.show_mapping())
         
     def do_show_mapping(self, _):
@@ -92,14 +135,30 @@ class Euclid09CLI(cmd.Cmd):
 
     ### patch operations
 
+    def spawn_population(self, record = True):
+        return Population(tracks=self.tracks,
+                          banks=self.sounds.banks if self.n_jobs > 1 and record else None,
+                          generators=self.generators,
+                          bpm=self.bpm,
+                          tpb=self.tpb,
+                          n_ticks=self.n_ticks,
+                          n_jobs=self.n_jobs,
+                          cache=self.render_cache if record else None,
+                          rand=self.rand)
+
+    def rank_patches(self, patches):
+        return rank_patches(patches=patches,
+                            generators=self.generators,
+                            n_ticks=self.n_ticks,
+                            bpm=self.bpm,
+                            tpb=self.tpb)
+
     @commit_and_render
     def do_randomise_patches(self, _):
-        sounds = self.sounds.render()
         """Create a randomised project with patches."""
-        return Project.randomise(tracks=self.tracks,
-                                 sounds=sounds,
-                                 n_patches=self.n_patches,
-                                 n_sounds = 2)
+        return self.spawn_population().randomise(sounds=self.sounds.render(),
+                                                 n_patches=self.n_patches,
+                                                 n_sounds=2)
                                  
     @assert_head
     @parse_line([{"name": "I", "type": "hexstr"}])
@@ -115,62 +174,148 @@ class Euclid09CLI(cmd.Cmd):
         project.freeze_patches(len(I))
         return project
             
+    @assert_head
+    @parse_line([{"name": "n", "type": "int"},
+                 {"name": "oversample", "type": "int", "default": 4}])
+    @commit_and_render
+    def do_select_best(self, n, oversample):
+        """Keep the n highest scoring patches and fill the remaining slots with the best scoring of oversample x as many mutations of them."""
+        if n < 1:
+            raise RuntimeError("n must be an integer greater than 0")
+        roots = self.git.head.content.patches
+        ranking, scores = self.rank_patches(roots)
+        best = [roots[i].clone() for i in ranking[:n]]
+        logging.info(", ".join([f"{i:x}={scores[i]:.2f}" for i in ranking[:n]]))
+        n_fill = max(0, self.n_patches - len(best))
+        candidates = Project(patches=Patches([best[i % len(best)].clone()
+                                              for i in range(n_fill * oversample)]))
+        candidates.freeze_patches(0) # winners may come from a frozen set, but their clones must be mutable
+        candidates = self.spawn_population(record=False).mutate(project=candidates,
+                                                                attrs=["pattern", "seeds"],
+                                                                n=1).patches
+        hashes, unique = {patch.hash for patch in best}, []
+        for patch in candidates: # no-op mutations would reproduce a winner, and outscore every real mutation
+            if patch.hash not in hashes:
+                hashes.add(patch.hash)
+                unique.append(patch)
+        ranking, _ = self.rank_patches(unique)
+        ranked = [unique[i] for i in ranking] or best
+        project = Project(patches=Patches(best + [ranked[i % len(ranked)].clone() for i in range(n_fill)]))
+        project.freeze_patches(len(best))
+        return project
+
     @assert_head
     @parse_line([{"name": "n", "type": "int"}])
     @commit_and_render
     def do_mutate_sounds(self, n):
         """Mutate the sounds of unfrozen patches in the project."""
-        sounds = self.sounds.render()
-        project = self.git.head.content.clone()
-        for patch in project.patches:
-            if not patch.frozen:
-                for _ in range(n):
-                    patch.mutate_attr(attr="sounds",
-                                      filter_fn=lambda x: True,
-                                      sounds=sounds)
-        return project
+        return self.spawn_population().mutate(project=self.git.head.content,
+                                              attrs=["sounds"],
+                                              n=n,
+                                              sounds=self.sounds.render())
 
     @assert_head
     @parse_line([{"name": "n", "type": "int"}])
     @commit_and_render
     def do_mutate_patterns(self, n):
         """Mutate the seeds of unfrozen patches in the project."""
-        project = self.git.head.content.clone()
-        for patch in project.patches:
-            if not patch.frozen:
-                for _ in range(n):
-                    attr = "pattern" if random.random() < 0.5 else "seeds"
-                    patch.mutate_attr(attr=attr,
-                                      filter_fn=lambda x: True)
-        return project
+        return self.spawn_population().mutate(project=self.git.head.content,
+                                              attrs=["pattern", "seeds"],
+                                              n=n)
         
     ### export
 
-    @assert_head
-    def do_export_stems(self, _):
-        """Export the current project as stems in a zip file."""
+    def cached_stems(self, project, levels, keys):
+        hits = [key in self.stem_cache for key in keys]
+        stems = export_stems(project=project,
+                             banks=self.sounds.banks,
+                             generators=self.generators,
+                             levels=[levels_ for levels_, hit in zip(levels, hits)
+                                     if not hit],
+                             bpm=self.bpm,
+                             tpb=self.tpb,
+                             n_ticks=self.n_ticks,
+                             n_jobs=self.n_jobs,
+                             cache=self.render_cache)
+        with closing(stems):
+            for key, hit in zip(keys, hits):
+                if hit:
+                    yield self.stem_cache.open(key), "cached"
+                else:
+                    _, wav_io = next(stems)
+                    self.stem_cache.put(key, wav_io)
+                    wav_io.seek(0)
+                    yield wav_io, None
+
+    def mixdown_stems(self, project, mix, solos, mutes, keys):
+        solo_keys, derived_keys = keys[1::2], [keys[0]] + keys[2::2]
+        with closing(self.cached_stems(project, solos, solo_keys)) as solo_stems:
+            stems = mixdown_stems([wav_io for wav_io, _ in solo_stems])
+        derived = [stems["mix"]]
+        for solo, mute in zip(stems["solos"], stems["mutes"]):
+            derived += [solo, mute]
+        if self.verify:
+            errors = []
+            with closing(self.cached_stems(project, [mix] + mutes, derived_keys)) as rendered_stems:
+                for wav_io, (rendered_io, _) in zip(derived[::2], rendered_stems):
+                    with rendered_io:
+                        errors.append(pcm_error(wav_io, rendered_io))
+            if max(errors) > self.tolerance:
+                logging.warning(f"Mixdown error {max(errors):.2e} exceeds tolerance {self.tolerance:.2e}; using rendered stems")
+                yield from self.cached_stems(project, [mix] + [levels_ for pair in zip(solos, mutes) for levels_ in pair], keys)
+                return
+            logging.info(f"Mixdown verified (max error {max(errors):.2e})")
+        for i, wav_io in enumerate(derived):
+            yield wav_io, "derived" if i % 2 == 0 else None
+
+    def export_commit(self, commit):
         if not os.path.exists("tmp/wav"):
             os.makedirs("tmp/wav")
-        commit_id = self.git.head.commit_id
+        commit_id = commit.commit_id
+        project = commit.content
         zip_name = f"tmp/wav/{commit_id.slug}-{self.bpm}-{self.n_ticks}.zip"
-        with zipfile.ZipFile(zip_name, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            levels = [Levels(self.tracks)]
-            for track in self.tracks:
-                levels.append(Levels(self.tracks).solo(track["name"]))
-                levels.append(Levels(self.tracks).mute(track["name"]))
-            project = self.git.head.content
-            for levels_ in levels:
-                container = project.render(banks=self.sounds.banks,
-                                           generators=self.generators,
-                                           levels=levels_,
-                                           bpm=self.bpm,
-                                           tpb=self.tpb,
-                                           n_ticks=self.n_ticks)
-                sv_project = container.render_project()
-                wav_io = export_wav(project=sv_project)
+        mix = Levels(self.tracks)
+        solos = [Levels(self.tracks).solo(track["name"]) for track in self.tracks]
+        mutes = [Levels(self.tracks).mute(track["name"]) for track in self.tracks]
+        levels = [mix] + [levels_ for pair in zip(solos, mutes) for levels_ in pair]
+        keys = [stem_key(project=project,
+                         levels=levels_,
+                         bpm=self.bpm,
+                         tpb=self.tpb,
+                         n_ticks=self.n_ticks,
+                         cutoff=self.cutoff)
+                for levels_ in levels]
+        export_key = content_hash([keys, self.compression, self.export_mode, self.verify, self.tolerance]).encode()
+        if os.path.exists(zip_name):
+            try:
+                with zipfile.ZipFile(zip_name, 'r') as zip_file:
+                    if zip_file.comment == export_key:
+                        logging.info(f"{zip_name} is up to date")
+                        return
+            except zipfile.BadZipFile:
+                logging.warning(f"{zip_name} is unreadable; exporting again")
+        if self.export_mode == "mixdown":
+            stems = self.mixdown_stems(project, mix, solos, mutes, keys)
+        else:
+            stems = self.cached_stems(project, levels, keys)
+        tmp_name = f"{zip_name}.tmp"
+        with closing(stems), zipfile.ZipFile(tmp_name, 'w', Compression[self.compression]) as zip_file:
+            for levels_, (wav_io, source) in zip(levels, stems):
                 wav_name = f"{commit_id.short_name}-{levels_.short_code}.wav"
-                logging.info(wav_name)
-                zip_file.writestr(wav_name, wav_io.getvalue())
+                logging.info(f"{wav_name} ({source})" if source else wav_name)
+                write_stem(zip_file, wav_name, wav_io)
+            zip_file.comment = export_key
+        os.replace(tmp_name, zip_name)
+        self.stem_cache.evict()
+
+    @assert_head
+    def do_export_stems(self, _):
+        """Export the current project as stems in a zip file."""
+        if self.defer:
+            self.deferred_exports.append(self.git.head)
+            logging.info(f"Deferred export of {self.git.head.commit_id}")
+        else:
+            self.export_commit(self.git.head)
 
     ### git
     
@@ -198,21 +343,34 @@ class Euclid09CLI(cmd.Cmd):
         """Redo the last undone commit."""
         self.git.redo()
 
+    def do_git_import(self, root):
+        """Import commits from a directory of json files into the current store."""
+        root = root.strip() if root.strip() else "tmp/git"
+        if not os.path.isdir(root):
+            logging.error(f"{root} is not a directory")
+            return
+        n = migrate_store(src = SharedStore(DirStore(root)),
+                          dest = self.git.store)
+        logging.info(f"Imported {n} commits from {root}")
+        self.git = self.init_git()
+        self.git.fetch()
+
     ### project management
 
+    @interactive
     def do_clean_projects(self, _):
         """Clean all temporary project directories."""
         while True:
             answer = input(f"Are you sure ?: ")
             if answer == "y":
-                for dir_name in ["tmp/git", "tmp/sunvox"]:
+                for dir_name in ["tmp/git", "tmp/git/blobs", "tmp/sunvox"]:
                     if os.path.exists(dir_name):
                         logging.info(f"cleaning {dir_name}")
                         for filename in os.listdir(dir_name):
                             file_path = os.path.join(dir_name, filename)
                             if os.path.isfile(file_path):
                                 os.remove(file_path)
-                self.git = Git("tmp/git")
+                self.git = self.init_git()
                 break
             elif answer == "n":
                 break
@@ -234,7 +392,14 @@ def parse_args(default_bpm = 120,
                default_tpb = 1,
                default_n_ticks = 16,
                default_n_patches = 16,
-               default_cutoff = 250): # 2 * 2000 / 16 == two ticks @ 120 bpm
+               default_cutoff = 250, # 2 * 2000 / 16 == two ticks @ 120 bpm
+               default_jobs = 1,
+               default_store = "dir",
+               default_codec = "json",
+               default_script = None,
+               default_compression = "deflated",
+               default_export_mode = "render",
+               default_tolerance = 1e-3):
     parser = argparse.ArgumentParser(description="Run Euclid09CLI with specified parameters.")
     parser.add_argument(
         "--bpm",
@@ -266,6 +431,68 @@ def parse_args(default_bpm = 120,
         default=default_cutoff,
         help=f"A float > 0 specifying the cutoff value (default: {default_cutoff})."
     )  
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=default_jobs,
+        help=f"An integer > 0 specifying the number of worker processes used to generate patches and export stems (default: {default_jobs})."
+    )
+    parser.add_argument(
+        "--store",
+        choices=list(Stores.keys()),
+        default=default_store,
+        help=f"Commit storage backend; `dir` writes one json file per commit, `log` appends to a single file (default: {default_store})."
+    )
+    parser.add_argument(
+        "--codec",
+        choices=list(Codecs.keys()),
+        default=default_codec,
+        help=f"Commit encoding for new commits; orjson and msgpack are only offered when installed, and msgpack requires the `dir` store. Existing commits are readable whatever the codec (default: {default_codec})."
+    )
+    parser.add_argument(
+        "--compression",
+        choices=list(Compression.keys()),
+        default=default_compression,
+        help=f"Zip compression for exported stems; deflate gains little on PCM, so `stored` is much faster (default: {default_compression})."
+    )
+    parser.add_argument(
+        "--export_mode",
+        choices=["render", "mixdown"],
+        default=default_export_mode,
+        help=f"`render` renders the mix, every solo and every mute (2N + 1 renders); `mixdown` renders the N solos and derives the mix and mutes by summing PCM, which is exact for FX- free tracks and requires numpy (default: {default_export_mode})."
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="In mixdown mode, also render the mix and mutes and fall back to them if the derived stems differ by more than --tolerance."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=default_tolerance,
+        help=f"Maximum absolute sample error, as a fraction of full scale, allowed between derived and rendered stems (default: {default_tolerance})."
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed for the session's random number generator; the same seed and commands produce the same commits (default: unseeded)."
+    )
+    parser.add_argument(
+        "--script",
+        default=default_script,
+        help="Run headless; a file of commands (one per line, or a yaml job spec with `commands` and `defer` keys), or `-` for stdin."
+    )
+    parser.add_argument(
+        "--defer",
+        action="store_true",
+        help="Defer .sunvox writes and stem exports until all script commands have run; requires --script."
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Only log warnings while script commands run; timings are still reported. Requires --script."
+    )
     args = parser.parse_args()
     if args.bpm <= 0:
         parser.error("bpm must be an integer greater than 0.")
@@ -277,21 +504,47 @@ def parse_args(default_bpm = 120,
         parser.error("n_patches must be an integer greater than 0.")
     if args.cutoff <= 0:
         parser.error("cutoff must be a float greater than 0.")
+    if args.jobs <= 0:
+        parser.error("jobs must be an integer greater than 0.")
+    if args.verify and args.export_mode != "mixdown":
+        parser.error("verify only applies to --export_mode mixdown.")
+    if args.quiet and not args.script:
+        parser.error("quiet requires --script.")
+    if args.defer and not args.script:
+        parser.error("defer requires --script; deferred work is only flushed when a script completes.")
     return args
 
 if __name__ == "__main__":
     try:
         args = parse_args()
         tracks = load_yaml("tracks.yaml")
+        validate_tracks(tracks)
         sounds = Sounds(tracks = tracks,
                         cutoff = args.cutoff)
-        Euclid09CLI(tracks = tracks,
-                    sounds = sounds,
-                    generators = [Beat, GhostEcho],
-                    bpm = args.bpm,
-                    tpb = args.tpb,
-                    n_ticks = args.n_ticks,
-                    n_patches = args.n_patches).cmdloop()                
+        script = load_script(args.script) if args.script else None
+        cli = Euclid09CLI(tracks = tracks,
+                          sounds = sounds,
+                          generators = [Beat, GhostEcho],
+                          bpm = args.bpm,
+                          tpb = args.tpb,
+                          n_ticks = args.n_ticks,
+                          n_patches = args.n_patches,
+                          n_jobs = args.jobs,
+                          store = args.store,
+                          codec = args.codec,
+                          defer = args.defer or (script["defer"] if script else False),
+                          cutoff = args.cutoff,
+                          seed = args.seed,
+                          compression = args.compression,
+                          export_mode = args.export_mode,
+                          verify = args.verify,
+                          tolerance = args.tolerance)
+        if script:
+            run_script(cli = cli,
+                       commands = script["commands"],
+                       quiet = args.quiet)
+        else:
+            cli.cmdloop()
     except ValueError as error:
         logging.error(str(error))
     except RuntimeError as error:
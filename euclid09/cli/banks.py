@@ -0,0 +1,59 @@
+from sv.banks import SVBank, SVBanks
+
+import mmap
+import os
+import zipfile
+
+"""
+- each bank zip is decoded once into a ZIP_STORED copy under tmp/banks, so reading a sample is a slice of the mapped file rather than an inflate
+- banks are served through read- only memory maps, so repeated renders and export workers share the same page cache pages rather than each holding a copy of every zip
+- MappedFile pickles as its path, so sending banks to a worker process re- maps the file rather than copying its contents
+- getvalue() returns a read- only memoryview over the map rather than a bytes copy of the whole bank
+"""
+
+class MappedFile(mmap.mmap):
+
+    def __new__(cls, path):
+        with open(path, "rb") as file:
+            mapped = mmap.mmap.__new__(cls, file.fileno(), 0, access = mmap.ACCESS_READ)
+        mapped.path = path
+        return mapped
+
+    def __reduce__(self):
+        return (MappedFile, (self.path,))
+
+    def seekable(self):
+        return True
+
+    def getvalue(self):
+        return memoryview(self)
+
+def decode_bank(zip_path, decoded_dir):
+    with zipfile.ZipFile(zip_path, "r") as zip_file:
+        infos = zip_file.infolist()
+        if all(info.compress_type == zipfile.ZIP_STORED for info in infos):
+            return zip_path
+        decoded_path = os.path.join(decoded_dir, os.path.basename(zip_path))
+        if (os.path.exists(decoded_path) and
+            os.path.getmtime(decoded_path) >= os.path.getmtime(zip_path)):
+            return decoded_path
+        if not os.path.exists(decoded_dir):
+            os.makedirs(decoded_dir)
+        tmp_path = f"{decoded_path}.tmp"
+        with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_STORED) as decoded_file:
+            for info in infos:
+                decoded_file.writestr(info.filename, zip_file.read(info))
+        os.replace(tmp_path, decoded_path)
+    return decoded_path
+
+def load_mapped_banks(cache_dir = "banks", decoded_dir = "tmp/banks"):
+    banks = SVBanks()
+    for file_name in sorted(os.listdir(cache_dir)):
+        if file_name.endswith(".zip"):
+            zip_path = decode_bank(os.path.join(cache_dir, file_name), decoded_dir)
+            banks.append(SVBank(name = file_name.split(".")[0],
+                                zip_buffer = MappedFile(zip_path)))
+    return banks
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,71 @@
+import logging
+import sys
+import time
+import yaml
+
+"""
+- scripts are either plain text, one command per line with `#` comments, or a yaml job spec with a `commands` list and an optional `defer` flag
+- files are told apart by extension; stdin has none, so it is read as a job spec if it parses as a yaml mapping with `commands`, and as plain text otherwise
+- commands marked interactive (they prompt via input()) are rejected before anything runs, since a headless run would block or hit EOF
+- deferred .sunvox writes and exports are flushed after the last command, and the flush is timed like any other command
+"""
+
+def interactive(fn):
+    fn.interactive = True
+    return fn
+
+def parse_spec(text):
+    try:
+        spec = yaml.safe_load(text)
+    except yaml.YAMLError:
+        return None
+    return spec if isinstance(spec, dict) and "commands" in spec else None
+
+def load_script(path):
+    file = sys.stdin if path == "-" else open(path)
+    with file:
+        text = file.read()
+    spec = parse_spec(text) if path == "-" or path.endswith((".yaml", ".yml")) else None
+    if path.endswith((".yaml", ".yml")) and spec is None:
+        raise RuntimeError(f"{path} is not a job spec with a `commands` list")
+    if spec is not None:
+        return {"commands": [str(command) for command in spec["commands"]],
+                "defer": spec.get("defer", False)}
+    lines = [line.strip() for line in text.splitlines()]
+    return {"commands": [line for line in lines
+                         if line and not line.startswith("#")],
+            "defer": False}
+
+def validate_commands(cli, commands):
+    for command in commands:
+        name, _, _ = cli.parseline(command)
+        if getattr(getattr(cli, f"do_{name}", None), "interactive", False):
+            raise RuntimeError(f"{name} is interactive and can't be run from a script")
+
+def run_script(cli, commands, quiet = False):
+    validate_commands(cli, commands)
+    logger = logging.getLogger()
+    level = logger.level
+    if quiet:
+        logger.setLevel(logging.WARNING)
+    timings = []
+    try:
+        cli.preloop()
+        for command in commands:
+            start = time.perf_counter()
+            stop = cli.onecmd(command)
+            timings.append((command, time.perf_counter() - start))
+            if stop:
+                break
+        start = time.perf_counter()
+        cli.flush()
+        timings.append(("flush", time.perf_counter() - start))
+    finally:
+        logger.setLevel(level)
+    for command, timing in timings:
+        logging.info(f"{timing:.3f}s {command}")
+    logging.info(f"{sum(timing for _, timing in timings):.3f}s total")
+    return timings
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,135 @@
+from sv.utils.export import export_wav
+
+from euclid09.model import RenderCache, content_hash
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import os
+import shutil
+import zipfile
+
+"""
+- worker state is initialised once per process, so project, banks and generators are pickled once per worker rather than once per stem
+- Levels is an OrderedDict subclass with a custom constructor which doesn't survive pickling, hence workers are sent plain dicts
+- each worker keeps its own render cache, so tracks at the same level are only generated once per worker across variants
+- results are yielded in submission order, so the zip is written in the same order as the serial path
+- at most n_jobs renders are in flight, so only that many wav buffers are held at once; each buffer is streamed into its zip entry (and the stem cache) in chunks, with no further copies
+"""
+
+"""
+- StemCache holds rendered wavs under tmp/stems, keyed by the content hashes of the audible (level > 0) tracks in each patch plus levels, bpm, tpb, n_ticks and cutoff
+- muted tracks render at zero level and so can't change a stem, which means a child commit that differs in one track reuses every stem in which that track is silent
+- eviction is least- recently- used by file mtime, and is deferred until an export is complete so that entries it is about to read aren't removed mid- export
+"""
+
+Worker = {}
+
+ChunkSize = 1 << 20
+
+Compression = {"deflated": zipfile.ZIP_DEFLATED,
+               "stored": zipfile.ZIP_STORED}
+
+def stem_key(project, levels, bpm, tpb, n_ticks, cutoff):
+    tracks = [[track.hash for track in patch.tracks
+               if levels.get(track.name, 1) > 0]
+              for patch in project.patches]
+    return content_hash({"tracks": tracks,
+                         "levels": dict(levels),
+                         "bpm": bpm,
+                         "tpb": tpb,
+                         "n_ticks": n_ticks,
+                         "cutoff": cutoff})
+
+class StemCache:
+
+    def __init__(self, root, max_bytes = 1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def file_path(self, key):
+        return os.path.join(self.root, f"{key}.wav")
+
+    def __contains__(self, key):
+        return os.path.exists(self.file_path(key))
+
+    def open(self, key):
+        file_path = self.file_path(key)
+        os.utime(file_path)
+        return open(file_path, "rb")
+
+    def put(self, key, wav_io):
+        if not os.path.exists(self.root):
+            os.makedirs(self.root)
+        tmp_path = f"{self.file_path(key)}.tmp"
+        with open(tmp_path, "wb") as file:
+            shutil.copyfileobj(wav_io, file, ChunkSize)
+        os.replace(tmp_path, self.file_path(key))
+
+    def evict(self):
+        if not os.path.exists(self.root):
+            return
+        entries = sorted((os.path.getmtime(file_path), os.path.getsize(file_path), file_path)
+                         for file_path in [os.path.join(self.root, file_name)
+                                           for file_name in os.listdir(self.root)
+                                           if file_name.endswith(".wav")])
+        total = sum(size for _, size, _ in entries)
+        for _, size, file_path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(file_path)
+            total -= size
+
+def render_wav(project, banks, generators, levels, bpm, tpb, n_ticks, cache = None):
+    container = project.render(banks = banks,
+                               generators = generators,
+                               levels = levels,
+                               bpm = bpm,
+                               tpb = tpb,
+                               n_ticks = n_ticks,
+                               cache = cache)
+    sv_project = container.render_project()
+    wav_io = export_wav(project = sv_project)
+    wav_io.seek(0)
+    return wav_io
+
+def init_worker(env):
+    Worker.update(env)
+    Worker["cache"] = RenderCache()
+
+def render_worker_wav(levels):
+    return render_wav(levels = levels, **Worker)
+
+def export_stems(project, banks, generators, levels, bpm, tpb, n_ticks, n_jobs = 1, cache = None):
+    env = {"project": project,
+           "banks": banks,
+           "generators": generators,
+           "bpm": bpm,
+           "tpb": tpb,
+           "n_ticks": n_ticks}
+    if n_jobs == 1:
+        for levels_ in levels:
+            yield levels_, render_wav(levels = levels_, cache = cache, **env)
+    else:
+        with ProcessPoolExecutor(max_workers = n_jobs,
+                                 initializer = init_worker,
+                                 initargs = (env,)) as executor:
+            pending, futures = iter(levels), deque()
+            def submit():
+                levels_ = next(pending, None)
+                if levels_ is not None:
+                    futures.append((levels_, executor.submit(render_worker_wav, dict(levels_))))
+            for _ in range(n_jobs):
+                submit()
+            while futures:
+                levels_, future = futures.popleft()
+                wav_io = future.result()
+                submit()
+                yield levels_, wav_io
+
+def write_stem(zip_file, wav_name, wav_io):
+    with wav_io, zip_file.open(wav_name, "w") as entry:
+        shutil.copyfileobj(wav_io, entry, ChunkSize)
+
+if __name__ == "__main__":
+    pass
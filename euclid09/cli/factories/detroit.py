@@ -1,5 +1,12 @@
-from sv.banks import SVBanks
+from sv.machines.beats.detroit import DetroitSound
 
+from euclid09.cli.banks import load_mapped_banks
+from euclid09.model import content_hash
+
+from functools import lru_cache
+
+import json
+import os
 import random
 import yaml
 
@@ -27,25 +34,83 @@ pad: (pad)
 sweep: (swp)|(sweep)
 """)
 
-Banks = SVBanks.load_zip(cache_dir="banks")          
+"""
+- banks are loaded on first use rather than at import, are shared by all factories, and are served from memory- mapped decoded copies (see euclid09.cli.banks)
+- tag lookups go through an inverted tag -> samples index, persisted as json and keyed by the bank zips' names, sizes and mtimes plus the tag patterns; the banks are only loaded (and the pool spawned) when the index is missing or stale
+- the index is written to a temporary file and renamed into place, so an interrupted write never leaves a truncated index behind
+"""
+
+Indexes = {}
+
+@lru_cache(maxsize = None)
+def load_banks(cache_dir = "banks"):
+    return load_mapped_banks(cache_dir = cache_dir)
+
+def index_key(cache_dir, terms):
+    banks = [[file_name,
+              os.path.getsize(os.path.join(cache_dir, file_name)),
+              os.path.getmtime(os.path.join(cache_dir, file_name))]
+             for file_name in sorted(os.listdir(cache_dir))
+             if file_name.endswith(".zip")]
+    return content_hash({"banks": banks, "terms": terms})
+
+def build_index(banks, terms):
+    pool, _ = banks.spawn_pool(tag_patterns = terms)
+    index = {}
+    for sample in pool.match(lambda sample: True):
+        for tag in sample.tags:
+            index.setdefault(tag, []).append(sample.as_dict())
+    return index
+
+def load_index(terms, cache_dir = "banks", index_dir = "tmp/banks"):
+    key = index_key(cache_dir, terms)
+    if key not in Indexes:
+        index_path = os.path.join(index_dir, f"detroit-{key}.json")
+        if os.path.exists(index_path):
+            with open(index_path, "r") as file:
+                Indexes[key] = json.load(file)
+        else:
+            Indexes[key] = build_index(load_banks(cache_dir), terms)
+            if not os.path.exists(index_dir):
+                os.makedirs(index_dir)
+            tmp_path = f"{index_path}.tmp"
+            with open(tmp_path, "w") as file:
+                file.write(json.dumps(Indexes[key]))
+            os.replace(tmp_path, index_path)
+    return Indexes[key]
 
 class DetroitSoundFactory:
 
-    def __init__(self, track, cutoff, banks = Banks, terms = Terms, **kwargs):
-        self.banks = banks
-        self.pool, _ = self.banks.spawn_pool(tag_patterns = terms)
+    def __init__(self, track, cutoff, banks = None, terms = Terms, **kwargs):
+        self._banks = banks
+        self._index = None
+        self.terms = terms
         self.value = self.default_value = track["tag"]
         self.options = list(terms.keys())
         self.cutoff = cutoff
 
-    def randomise(self):
-        self.value = random.choice(self.options)        
+    @property
+    def banks(self):
+        if self._banks is None:
+            self._banks = load_banks()
+        return self._banks
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = (build_index(self._banks, self.terms)
+                           if self._banks is not None
+                           else load_index(self.terms))
+        return self._index
+
+    def randomise(self, rand = random):
+        self.value = rand.choice(self.options)        
 
     def reset(self):
         self.value = self.default_value
         
     def render(self):
-        sounds = self.pool.match(lambda sample: self.value in sample.tags)
+        sounds = [DetroitSound(**sample) for sample in self.index.get(self.value, [])]
         for sound in sounds:
             sound.cutoff = self.cutoff
         return sounds
@@ -0,0 +1,67 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import io
+import wave
+
+"""
+- mixdown export renders each track solo once and derives the full mix and every mute stem by summing PCM, so N renders replace 2N + 1
+- this is exact only when the signal chain is linear; shared effects, master compression or clipping in the true render will make derived stems drift, hence the verification option
+- sums are taken in int64 and clipped back to the sample width, which is what a true render at full scale would do on overflow
+- numpy is an optional dependency, only required for mixdown mode
+"""
+
+SampleTypes = {2: "<i2",
+               4: "<i4"}
+
+def read_pcm(wav_io):
+    with wave.open(wav_io, "rb") as wav_file:
+        params = wav_file.getparams()
+        frames = wav_file.readframes(params.nframes)
+    wav_io.seek(0)
+    if params.sampwidth not in SampleTypes:
+        raise RuntimeError(f"Unsupported sample width: {params.sampwidth}")
+    return params, np.frombuffer(frames, dtype = SampleTypes[params.sampwidth]).astype(np.int64)
+
+def write_pcm(params, samples):
+    info = np.iinfo(SampleTypes[params.sampwidth])
+    frames = np.clip(samples, info.min, info.max).astype(SampleTypes[params.sampwidth]).tobytes()
+    wav_io = io.BytesIO()
+    with wave.open(wav_io, "wb") as wav_file:
+        wav_file.setparams(params)
+        wav_file.writeframes(frames)
+    wav_io.seek(0)
+    return wav_io
+
+def mixdown_stems(solos):
+    if np is None:
+        raise RuntimeError("Mixdown export requires numpy")
+    pcm = []
+    for wav_io in solos:
+        with wav_io:
+            pcm.append(read_pcm(wav_io))
+    params = pcm[0][0]
+    for params_, _ in pcm:
+        if params_[:3] != params[:3]:
+            raise RuntimeError("Solo stems have mismatched formats")
+    n_samples = max(len(samples) for _, samples in pcm)
+    samples = np.zeros((len(pcm), n_samples), dtype = np.int64)
+    for i, (_, samples_) in enumerate(pcm):
+        samples[i, :len(samples_)] = samples_
+    mix = samples.sum(axis = 0)
+    return {"mix": write_pcm(params, mix),
+            "solos": [write_pcm(params, solo) for solo in samples],
+            "mutes": [write_pcm(params, mix - solo) for solo in samples]}
+
+def pcm_error(derived_io, rendered_io):
+    (params, derived), (_, rendered) = read_pcm(derived_io), read_pcm(rendered_io)
+    n_samples = max(len(derived), len(rendered))
+    derived = np.pad(derived, (0, n_samples - len(derived)))
+    rendered = np.pad(rendered, (0, n_samples - len(rendered)))
+    full_scale = np.iinfo(SampleTypes[params.sampwidth]).max
+    return float(np.abs(derived - rendered).max(initial = 0)) / full_scale
+
+if __name__ == "__main__":
+    pass
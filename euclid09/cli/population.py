@@ -0,0 +1,110 @@
+from euclid09.model import Patch, Patches, Project, RenderCache, random_seed
+
+from concurrent.futures import ProcessPoolExecutor
+
+import random
+
+"""
+- each patch is generated from its own seed, drawn up front from the session rng in patch order, and every task builds a private Random from that seed; a seeded session therefore produces the same project whatever the number of workers
+- tasks copy the sound pools before randomising, since Track.randomise shuffles them in place and pool order would otherwise leak from one task into the next
+- the serial path passes env straight to the task functions rather than going through the Worker global, so running in- process leaves no state behind
+- in parallel, each worker also renders its patch into a private RenderCache and returns the recorded trigs; these are merged into the session cache in patch order, so the main process's render of the full project replays them rather than running the generators again
+"""
+
+Worker = {}
+
+def init_worker(env):
+    Worker.update(env)
+
+def record_trigs(patch, env = Worker):
+    if not env["render"]:
+        return []
+    cache = RenderCache()
+    Project(patches = Patches([patch])).render(banks = env["banks"],
+                                               generators = env["generators"],
+                                               bpm = env["bpm"],
+                                               tpb = env["tpb"],
+                                               n_ticks = env["n_ticks"],
+                                               cache = cache)
+    return list(cache.items())
+
+def randomise_patch(seed, env = Worker):
+    rand = random.Random(seed)
+    sounds = {name: list(pool) for name, pool in env["sounds"].items()}
+    patch = Patch.randomise(tracks = env["tracks"],
+                            sounds = sounds,
+                            n_sounds = env["n_sounds"],
+                            rand = rand)
+    return patch, record_trigs(patch, env)
+
+def mutate_patch(patch, seed, attrs, n, env = Worker):
+    rand = random.Random(seed)
+    for _ in range(n):
+        patch.mutate_attr(attr = rand.choice(attrs),
+                          filter_fn = lambda x: True,
+                          sounds = env["sounds"],
+                          rand = rand)
+    return patch, record_trigs(patch, env)
+
+class Population:
+
+    def __init__(self, tracks, banks, generators, bpm, tpb, n_ticks, n_jobs = 1, cache = None, rand = random):
+        self.tracks = tracks
+        self.banks = banks
+        self.generators = generators
+        self.bpm = bpm
+        self.tpb = tpb
+        self.n_ticks = n_ticks
+        self.n_jobs = n_jobs
+        self.cache = cache
+        self.rand = rand
+
+    def run(self, fn, tasks, sounds, n_sounds = 2):
+        if tasks == []:
+            return []
+        env = {"tracks": self.tracks,
+               "sounds": sounds,
+               "n_sounds": n_sounds,
+               "banks": self.banks,
+               "generators": self.generators,
+               "bpm": self.bpm,
+               "tpb": self.tpb,
+               "n_ticks": self.n_ticks,
+               "render": self.n_jobs > 1 and self.cache is not None}
+        if self.n_jobs == 1:
+            results = [fn(*task, env = env) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers = self.n_jobs,
+                                     initializer = init_worker,
+                                     initargs = (env,)) as executor:
+                results = list(executor.map(fn, *zip(*tasks),
+                                            chunksize = max(1, len(tasks) // (4 * self.n_jobs))))
+        patches = []
+        for patch, trigs in results:
+            for key, value in trigs:
+                self.cache.put(key, value)
+            patches.append(patch)
+        return patches
+
+    def randomise(self, sounds, n_patches, n_sounds = 2):
+        seeds = [random_seed(self.rand) for _ in range(n_patches)]
+        return Project(patches = Patches(self.run(fn = randomise_patch,
+                                                  tasks = [(seed,) for seed in seeds],
+                                                  sounds = sounds,
+                                                  n_sounds = n_sounds)))
+
+    def mutate(self, project, attrs, n, sounds = None):
+        project = project.clone()
+        indexes = [i for i, patch in enumerate(project.patches)
+                   if not patch.frozen]
+        seeds = [random_seed(self.rand) for _ in indexes]
+        patches = self.run(fn = mutate_patch,
+                           tasks = [(project.patches[i], seed, attrs, n)
+                                    for i, seed in zip(indexes, seeds)],
+                           sounds = sounds)
+        for i, patch in zip(indexes, patches):
+            project.patches[i] = patch
+        return project
+
+if __name__ == "__main__":
+    pass
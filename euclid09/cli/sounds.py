@@ -1,22 +1,26 @@
 from sv.banks import SVBanks
-from sv.project import load_class
+
+from euclid09.registry import resolve_class
+
+import random
         
 class Sounds:
 
     def __init__(self, tracks, **kwargs):
         self.tracks = tracks
+        self._banks = None
         for track in tracks:
             tokens = track["machine"].split(".")
             mod_name, class_name = tokens[-2], tokens[-1].replace("Machine", "SoundFactory")            
-            factory_class = load_class(f"euclid09.cli.factories.{mod_name}.{class_name}")
+            factory_class = resolve_class(f"euclid09.cli.factories.{mod_name}.{class_name}")
             track["sound"] = factory_class(track = track, **kwargs)
 
     def show_mapping(self):
         return ", ".join([f"{track['name']}={track['sound'].value}" for track in self.tracks])
 
-    def randomise_mapping(self):
+    def randomise_mapping(self, rand = random):
         for track in self.tracks:
-            track["sound"].randomise()
+            track["sound"].randomise(rand = rand)
 
     def reset_mapping(self, tracks):
         for track in self.tracks:
@@ -24,12 +28,16 @@ class Sounds:
 
     @property
     def banks(self):
-        banks = SVBanks()
-        for track in self.tracks:
-            sound = track["sound"]
-            if hasattr(sound, "banks"):
-                banks += sound.banks
-        return banks        
+        if self._banks is None:
+            banks, aggregated = SVBanks(), []
+            for track in self.tracks:
+                sound = track["sound"]
+                if (hasattr(sound, "banks") and
+                    not any(sound.banks is other for other in aggregated)):
+                    banks += sound.banks
+                    aggregated.append(sound.banks)
+            self._banks = banks
+        return self._banks
             
     def render(self):
         return {track["name"]: track["sound"].render()
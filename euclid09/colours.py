@@ -5,9 +5,10 @@ class Colour(list):
     @staticmethod
     def randomise(offset = 64,
                   contrast = 128,
-                  n = 256):
+                  n = 256,
+                  rand = random):
         for i in range(n):
-            rgb = [int(offset + random.random() * (255 - offset))
+            rgb = [int(offset + rand.random() * (255 - offset))
                    for i in range(3)]
             if (max(rgb) - min(rgb)) > contrast:
                 return Colour(rgb)
@@ -19,37 +20,37 @@ class Colour(list):
     def clone(self):
         return Colour(self)
 
-    def mutate(self, range = 32):
+    def mutate(self, range = 32, rand = random):
         for i, v in enumerate(self):
-            q = int(2 * random.random() * range) - range
+            q = int(2 * rand.random() * range) - range
             self[i] = max(0, min(255, v + q))
         return self
     
 class Colours(dict):
 
     @staticmethod
-    def randomise_machines(tracks):
+    def randomise_machines(tracks, rand = random):
         colours = {}
         for track in tracks:
-            colour = Colour.randomise()
+            colour = Colour.randomise(rand = rand)
             colours[track["name"]] = colour
         return colours
 
     @staticmethod
-    def randomise_patches(patches, quantise = 4):
+    def randomise_patches(patches, quantise = 4, rand = random):
         colours = []
         for i, patch in enumerate(patches):
             if 0 == i % quantise:                
-                colour = Colour.randomise()
+                colour = Colour.randomise(rand = rand)
             else:
-                colour = colours[-1].clone().mutate()
+                colour = colours[-1].clone().mutate(rand = rand)
             colours.append(colour)
         return colours
     
     @staticmethod
-    def randomise(tracks, patches):
-        machine_colours = Colours.randomise_machines(tracks)
-        patch_colours = Colours.randomise_patches(patches)
+    def randomise(tracks, patches, rand = random):
+        machine_colours = Colours.randomise_machines(tracks, rand = rand)
+        patch_colours = Colours.randomise_patches(patches, rand = rand)
         return Colours(machine_colours = machine_colours,
                        patch_colours = patch_colours)
 
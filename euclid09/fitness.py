@@ -0,0 +1,94 @@
+from itertools import combinations
+
+import random
+
+"""
+- patches are scored from the hits their generators produce, run against a probe machine which records note ticks and ignores everything else; nothing is rendered through sunvox
+- the probe seeds one Random per seed key, mirroring how machines seed their generators, so the hits scored are the hits that would be rendered
+- each scorer maps {track name: set of hit ticks} to a value in [0, 1], higher being better; a patch's score is the weighted mean over Scorers, so new scorers can be added (or weights changed) without touching the ranking code
+"""
+
+class Probe:
+
+    def __init__(self):
+        self.sound_index = 0
+
+    def toggle_sound(self):
+        self.sound_index = 1 - self.sound_index
+
+    def note(self, volume, level):
+        return volume * level
+
+    def modulation(self, **kwargs):
+        return None
+
+def track_hits(track, generators, n_ticks, bpm, tpb):
+    env = track.render_env(dry_level = 1,
+                           bpm = bpm,
+                           tpb = tpb)
+    hits = set()
+    for generator in generators:
+        rand = {key: random.Random(seed) for key, seed in track.seeds.items()}
+        for i, trig_block in generator(Probe(), n = n_ticks, rand = rand, **env):
+            if trig_block:
+                hits.add(i)
+    return hits
+
+def patch_hits(patch, generators, n_ticks, bpm, tpb):
+    return {track.name: track_hits(track = track,
+                                   generators = generators,
+                                   n_ticks = n_ticks,
+                                   bpm = bpm,
+                                   tpb = tpb)
+            for track in patch.tracks}
+
+def density_score(hits, n_ticks, max_density = 0.75):
+    scores = []
+    for ticks in hits.values():
+        density = len(ticks) / n_ticks
+        if density == 0:
+            scores.append(0)
+        else:
+            scores.append(min(1, (1 - density) / (1 - max_density)))
+    return sum(scores) / len(scores) if scores else 0
+
+def syncopation_score(hits, n_ticks, quantise = 4):
+    weights = [0 if 0 == i % quantise else
+               0.5 if 0 == i % (quantise // 2) else
+               1 for i in range(n_ticks)]
+    all_ticks = [i for ticks in hits.values() for i in ticks]
+    return sum(weights[i] for i in all_ticks) / len(all_ticks) if all_ticks else 0
+
+def overlap_score(hits, n_ticks):
+    pairs = [(a, b) for a, b in combinations(hits.values(), 2)
+             if a or b]
+    if pairs == []:
+        return 0
+    return 1 - sum(len(a & b) / len(a | b) for a, b in pairs) / len(pairs)
+
+Scorers = {"density": (density_score, 1),
+           "syncopation": (syncopation_score, 1),
+           "overlap": (overlap_score, 1)}
+
+def score_patch(patch, generators, n_ticks, bpm, tpb, scorers = Scorers):
+    hits = patch_hits(patch = patch,
+                      generators = generators,
+                      n_ticks = n_ticks,
+                      bpm = bpm,
+                      tpb = tpb)
+    total_weight = sum(weight for _, weight in scorers.values())
+    return sum(weight * scorer(hits, n_ticks)
+               for scorer, weight in scorers.values()) / total_weight
+
+def rank_patches(patches, generators, n_ticks, bpm, tpb, scorers = Scorers):
+    scores = [score_patch(patch = patch,
+                          generators = generators,
+                          n_ticks = n_ticks,
+                          bpm = bpm,
+                          tpb = tpb,
+                          scorers = scorers)
+              for patch in patches]
+    return sorted(range(len(patches)), key = lambda i: -scores[i]), scores
+
+if __name__ == "__main__":
+    pass
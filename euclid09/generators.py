@@ -1,11 +1,61 @@
+from euclid09.catalogue import Mask
+
+from itertools import repeat, starmap
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+"""
+- Beat streams trigs tick by tick; when numpy is installed, the pattern is a catalogue Mask and there are at least BatchSteps steps, it takes a batched path which emits the same trigs
+- below BatchSteps the array setup costs more than it saves, so the default 16- tick renders keep streaming
+- the batched path tiles the mask with numpy and only draws beat randoms at mask steps, preserving the short- circuit of the per- tick loop; volume, sound and beat are independent Random instances, so drawing each stream in one batch yields the same values as interleaving them tick by tick
+- groove is still called once per step, since a groove function may consume any number of volume draws
+- toggle_sound is called the same number of times, and in the same order relative to note, as in the per- tick loop
+"""
+
+BatchSteps = 256
+
+def batched_beat(self, n, rand, pattern, groove, temperature, density, dry_level, tpb):
+    n_steps = len(range(0, n, tpb))
+    volumes = [groove(rand = rand["volume"], i = j) for j in range(n_steps)]
+    toggles = np.fromiter(starmap(rand["sound"].random, repeat((), n_steps)),
+                          dtype = float, count = n_steps) < temperature
+    steps = np.flatnonzero(np.resize(np.frombuffer(pattern, dtype = np.uint8), n_steps))
+    beats = np.fromiter(starmap(rand["beat"].random, repeat((), len(steps))),
+                        dtype = float, count = len(steps)) < density
+    n_toggles = np.cumsum(toggles).tolist()
+    toggled = 0
+    for j in steps[beats].tolist():
+        for _ in range(n_toggles[j] - toggled):
+            self.toggle_sound()
+        toggled = n_toggles[j]
+        trig_block = self.note(volume = volumes[j],
+                               level = dry_level)
+        yield j * tpb, trig_block
+    for _ in range((n_toggles[-1] if n_toggles else 0) - toggled):
+        self.toggle_sound()
+
 def Beat(self, n, rand, pattern, groove, temperature, density, dry_level, tpb, **kwargs):
+    if (np is not None and
+        isinstance(pattern, Mask) and
+        len(range(0, n, tpb)) >= BatchSteps):
+        yield from batched_beat(self, n, rand,
+                                pattern = pattern,
+                                groove = groove,
+                                temperature = temperature,
+                                density = density,
+                                dry_level = dry_level,
+                                tpb = tpb)
+        return
     for i in range(n):
         if 0 == i % tpb:
             j = int(i / tpb)
             volume = groove(rand = rand["volume"], i = j)
             if rand["sound"].random() < temperature:
-                self.toggle_sound()        
-            if (pattern(j) and 
+                self.toggle_sound()
+            if (pattern(j) and
                 rand["beat"].random() < density):
                 trig_block = self.note(volume = volume,
                                        level = dry_level)
@@ -1,8 +1,21 @@
-from euclid09.model import Project
+from euclid09.cache import LRUCache
+from euclid09.model import Project, content_hash
 
 from sv.utils.naming import random_name
 
+from collections import OrderedDict
 from datetime import datetime
+from functools import partial
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 import json
 import logging
@@ -36,18 +49,238 @@ class CommitId:
     def __str__(self):
         return f"{self.timestamp}-{self.slug}"
 
+"""
+- codecs turn commit structs into bytes; json is compact rather than indented, orjson writes the same json faster, and msgpack is a smaller binary format
+- orjson and msgpack are optional, and are only offered when installed
+- reads never depend on the configured codec; the format is sniffed from the first byte, so indented json written by earlier versions, compact json and msgpack can all live in the same store
+"""
+
+class JSONCodec:
+
+    extension = ".json"
+    binary = False
+
+    def encode(self, struct):
+        return json.dumps(struct, separators = (",", ":")).encode()
+
+class OrjsonCodec:
+
+    extension = ".json"
+    binary = False
+
+    def encode(self, struct):
+        return orjson.dumps(struct)
+
+class MsgpackCodec:
+
+    extension = ".msgpack"
+    binary = True
+
+    def encode(self, struct):
+        return msgpack.packb(struct)
+
+Codecs = {"json": JSONCodec}
+
+if orjson:
+    Codecs["orjson"] = OrjsonCodec
+
+if msgpack:
+    Codecs["msgpack"] = MsgpackCodec
+
+Extensions = [".json", ".msgpack"]
+
+def decode_struct(data):
+    if data.lstrip()[:1] in [b"{", b"["]:
+        return orjson.loads(data) if orjson else json.loads(data)
+    if not msgpack:
+        raise RuntimeError("msgpack is required to read this entry")
+    return msgpack.unpackb(data)
+
+class DirStore:
+
+    def __init__(self, root, codec = None):
+        if not os.path.exists(root):
+            os.makedirs(root)
+        self.root = root
+        self.codec = codec if codec else JSONCodec()
+        self.paths = {}
+
+    def file_path(self, key):
+        return os.path.join(self.root, f"{key}{self.codec.extension}")
+
+    def keys(self):
+        self.paths = {}
+        for file_name in os.listdir(self.root):
+            key, extension = os.path.splitext(file_name)
+            if extension in Extensions:
+                self.paths[key] = os.path.join(self.root, file_name)
+        return sorted(self.paths.keys())
+
+    def get(self, key):
+        with open(self.paths.get(key, self.file_path(key)), "rb") as file:
+            return decode_struct(file.read())
+
+    def put(self, key, struct):
+        file_path = self.file_path(key)
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(self.codec.encode(struct))
+        os.replace(tmp_path, file_path)
+        self.paths[key] = file_path
+
+    def put_many(self, items):
+        for key, struct in items:
+            self.put(key, struct)
+
+    def spawn_blob_store(self):
+        return DirStore(os.path.join(self.root, "blobs"), codec = self.codec)
+
+class LogStore:
+
+    """
+    - each entry is appended to a single file as one `{key}\t{compact json}\n` line
+    - the offset index is built by one sequential scan which only splits lines on the first tab, so no json is decoded until an entry is read
+    - a trailing partial line (interrupted write) is truncated so that subsequent appends stay line- aligned
+    - put_many() appends a batch of entries with a single write
+    - entries must not contain newlines, so binary codecs are not supported
+    - keys are returned sorted, as DirStore does; they are timestamp- prefixed, so imported commits older than existing ones don't become HEAD just because they were appended last
+    """
+
+    def __init__(self, root, filename = "commits.log", codec = None):
+        if not os.path.exists(root):
+            os.makedirs(root)
+        self.root = root
+        self.codec = codec if codec else JSONCodec()
+        if self.codec.binary:
+            raise RuntimeError("LogStore requires a text codec")
+        self.path = os.path.join(root, filename)
+        self.index = OrderedDict()
+        self.scan()
+
+    def scan(self):
+        self.index.clear()
+        if not os.path.exists(self.path):
+            return
+        offset = 0
+        with open(self.path, "rb") as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                key = line.split(b"\t", 1)[0].decode()
+                self.index[key] = offset
+                offset += len(line)
+        if offset != os.path.getsize(self.path):
+            logging.warning(f"Truncating partial entry at end of {self.path}")
+            os.truncate(self.path, offset)
+
+    def keys(self):
+        return sorted(self.index.keys())
+
+    def get(self, key):
+        with open(self.path, "rb") as file:
+            file.seek(self.index[key])
+            line = file.readline()
+        return decode_struct(line.split(b"\t", 1)[1])
+
+    def put(self, key, struct):
+        self.put_many([(key, struct)])
+
+    def put_many(self, items):
+        lines = [key.encode() + b"\t" + self.codec.encode(struct) + b"\n"
+                 for key, struct in items]
+        with open(self.path, "ab") as file:
+            offset = file.tell()
+            file.write(b"".join(lines))
+        for (key, _), line in zip(items, lines):
+            self.index[key] = offset
+            offset += len(line)
+
+    def spawn_blob_store(self):
+        return LogStore(self.root, filename = "blobs.log", codec = self.codec)
+
+class SharedStore:
+
+    """
+    - tracks are written once to a content- addressed blob store, and each commit is saved as a manifest of track hashes plus frozen flags
+    - a mutation which changes one track per patch therefore only writes the new track blobs and a small manifest; new blobs are written as one batch, so over a LogStore a commit is one append to the blob log plus one to the commit log
+    - decoded blobs are held in an LRU cache keyed by hash, so projects loaded from nearby commits share their unchanged track data while blobs which are no longer read are freed
+    - entries written before blobs were introduced contain full tracks and are returned unchanged
+    """
+
+    def __init__(self, store, blobs = None, cache_size = 4096):
+        self.store = store
+        self.blobs = blobs if blobs else store.spawn_blob_store()
+        self.blob_keys = set(self.blobs.keys())
+        self.blob_cache = LRUCache(cache_size)
+
+    def keys(self):
+        return self.store.keys()
+
+
+    def get_blob(self, key):
+        return self.blob_cache.fetch(key, partial(self.blobs.get, key))
+
+    def put(self, key, struct):
+        blobs = {}
+        manifest = {"patches": [{"tracks": [self.add_blob(track, blobs)
+                                            for track in patch["tracks"]],
+                                 "frozen": patch["frozen"]}
+                                for patch in struct["patches"]]}
+        if blobs:
+            self.blobs.put_many(list(blobs.items()))
+            self.blob_keys.update(blobs.keys())
+        self.store.put(key, manifest)
+
+    def add_blob(self, struct, blobs):
+        key = content_hash(struct)
+        if key not in self.blob_keys:
+            blobs[key] = struct
+        return key
+
+    def get(self, key):
+        manifest = self.store.get(key)
+        return {"patches": [{"tracks": [self.get_blob(track) if isinstance(track, str) else track
+                                        for track in patch["tracks"]],
+                             "frozen": patch["frozen"]}
+                            for patch in manifest["patches"]]}
+
+Stores = {"dir": DirStore,
+          "log": LogStore}
+
+def migrate_store(src, dest):
+    existing = set(dest.keys())
+    n = 0
+    for key in src.keys():
+        if key not in existing:
+            dest.put(key, src.get(key))
+            n += 1
+    return n
+
 class Commit:
 
-    def __init__(self, commit_id, content):
+    """
+    - fetched commits are created with a loader rather than content, and are only deserialised (via the shared LRU cache) when content is first read
+    - commits created during a session hold their content directly
+    """
+
+    def __init__(self, commit_id, content = None, loader = None, cache = None):
         self.commit_id = commit_id
-        self.content = content
+        self._content = content
+        self.loader = loader
+        self.cache = cache
+
+    @property
+    def content(self):
+        if self._content is not None:
+            return self._content
+        return self.cache.fetch(str(self.commit_id), self.loader)
 
 class Git:
 
-    def __init__(self, root):
-        if not os.path.exists(root):
-            os.makedirs(root)
+    def __init__(self, root, store = None, cache_size = 64):
         self.root = root
+        self.store = store if store else DirStore(root)
+        self.cache = LRUCache(cache_size)
         self.commits = []
         self.head_index = -1
         self.redo_stack = []
@@ -65,11 +298,7 @@ class Git:
         self.commits.append(new_commit)
         self.head_index += 1
         self.redo_stack.clear()
-        filename = f"{new_commit.commit_id}.json"
-        file_path = os.path.join(self.root, filename)
-        with open(file_path, "w") as file:
-            data_json = json.dumps(new_commit.content.to_json(), indent=2)
-            file.write(data_json)
+        self.store.put(str(new_commit.commit_id), new_commit.content.to_json())
         logging.info(f"HEAD is {new_commit.commit_id}")
         return new_commit.commit_id
 
@@ -105,18 +334,17 @@ class Git:
         else:
             logging.info("no commits to redo")
 
+    def load_project(self, key):
+        return Project.from_json(self.store.get(key))
+
     def fetch(self):
-        files = sorted(f for f in os.listdir(self.root) if f.endswith(".json"))
-        for filename in files:
-            commit_id = CommitId.from_filename(filename)
-            file_path = os.path.join(self.root, filename)
-            with open(file_path, "r") as file:
-                data_json = json.load(file)
-                project = Project.from_json(data_json)
-                commit = Commit(commit_id = commit_id,
-                                content = project)
-                self.commits.append(commit)
-                logging.info(f"Fetched {filename}")
+        keys = self.store.keys()
+        for key in keys:
+            commit = Commit(commit_id = CommitId.from_filename(key),
+                            loader = partial(self.load_project, key),
+                            cache = self.cache)
+            self.commits.append(commit)
+        logging.info(f"Fetched {len(keys)} commits")
         self.head_index = len(self.commits) - 1
 
 if __name__ == "__main__":
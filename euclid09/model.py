@@ -1,47 +1,162 @@
-import sv.algos.euclid as euclid
-import sv.algos.groove.perkons as perkons
-
 from sv.container import SVContainer
-from sv.project import load_class, does_class_extend
 
+from euclid09 import catalogue
+from euclid09.cache import LRUCache
 from euclid09.colours import Colour
+from euclid09.registry import machine_class, register_cache, resolve_function, sound_class, validate_spec
+
+from collections.abc import Mapping
+from functools import lru_cache
 
-import copy
-import inspect
+import hashlib
+import json
 import random
-import sv # so machine classes can be dynamically accessed
+import weakref
 
 DefaultColour = Colour([127, 127, 127])
 
-def random_pattern():
-    pattern_kwargs = {k:v for k, v in zip(["pulses", "steps"], random.choice(euclid.TidalPatterns)[:2])}
-    return {"mod": "euclid",
-            "fn": "bjorklund",
-            "args": pattern_kwargs}
+class Spec(Mapping):
+
+    """
+    - frozen, tuple- backed mapping for pattern, groove and loaded sound specs
+    - instances are interned, so identical specs across tracks and commits share a single object rather than each holding its own dicts
+    - to_json() returns plain dicts, so serialised commits are unchanged; the dict is built once per interned spec and must be treated as read- only
+    - nested dicts and lists are frozen recursively, so any json value can be interned; thaw() returns a fresh, mutable copy
+    """
+
+    __slots__ = ["_items", "_hash", "_json", "__weakref__"]
+
+    Instances = weakref.WeakValueDictionary()
+
+    @staticmethod
+    def freeze(value):
+        if isinstance(value, dict):
+            return Spec.intern(value)
+        elif isinstance(value, (list, tuple)):
+            return tuple(Spec.freeze(item) for item in value)
+        return value
+
+    @staticmethod
+    def thaw_value(value):
+        if isinstance(value, Spec):
+            return value.thaw()
+        elif isinstance(value, tuple):
+            return [Spec.thaw_value(item) for item in value]
+        return value
+
+    @staticmethod
+    def intern(struct):
+        if isinstance(struct, Spec):
+            return struct
+        items = tuple(sorted((key, Spec.freeze(value))
+                             for key, value in struct.items()))
+        spec = Spec.Instances.get(items)
+        if spec is None:
+            spec = Spec.Instances[items] = Spec(items)
+        return spec
+
+    def __init__(self, items):
+        self._items = items
+        self._hash = hash(items)
+        self._json = self.thaw()
+
+    def __getitem__(self, key):
+        for key_, value in self._items:
+            if key_ == key:
+                return value
+        raise KeyError(key)
+
+    def __iter__(self):
+        return (key for key, _ in self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if isinstance(other, Spec):
+            return self._items == other._items
+        return Mapping.__eq__(self, other)
+
+    def __reduce__(self):
+        return (Spec.intern, (self.to_json(),))
+
+    def __repr__(self):
+        return f"Spec({self.to_json()})"
+
+    def to_json(self):
+        return self._json
+
+    def thaw(self):
+        return {key: Spec.thaw_value(value) for key, value in self._items}
+
+def random_pattern(rand = random):
+    pattern_kwargs = {k:v for k, v in zip(["pulses", "steps"], rand.choice(catalogue.TidalPatterns)[:2])}
+    return Spec.intern({"mod": "euclid",
+                        "fn": "bjorklund",
+                        "args": pattern_kwargs})
+
+def random_groove(rand = random):
+    return Spec.intern({"mod": "perkons",
+                        "fn": rand.choice(catalogue.GrooveNames)})
+
+def random_seed(rand = random):
+    return int(rand.random() * 1e8)
 
-def random_groove():
-    groove_fns = [name for name, _ in inspect.getmembers(perkons, inspect.isfunction)]    
-    return {"mod": "perkons",
-            "fn": random.choice(groove_fns)}
+def content_hash(struct):
+    return hashlib.sha1(json.dumps(struct, sort_keys = True).encode()).hexdigest()
 
-def random_seed():
-    return int(random.random() * 1e8)
+@register_cache
+@lru_cache(maxsize = None)
+def spawn_pattern(mod, fn, **kwargs):
+    if (mod, fn) == ("euclid", "bjorklund"):
+        return catalogue.bjorklund_mask(**kwargs)
+    return resolve_function(mod, fn)(**kwargs)
 
-def spawn_function(mod, fn, **kwargs):
-    return getattr(eval(mod), fn)
+def spawn_groove(mod, fn, **kwargs):
+    if mod == "perkons" and fn in catalogue.GrooveFunctions:
+        return catalogue.GrooveFunctions[fn]
+    return resolve_function(mod, fn)
+
+class RenderCache(LRUCache):
+
+    """
+    - caches the trig blocks yielded by each generator, keyed by track content hash, generator name and render env
+    - unchanged tracks (eg those in frozen patches) replay their cached trigs rather than re- running the generators
+    """
+
+    def __init__(self, maxsize = 4096):
+        LRUCache.__init__(self, maxsize)
+
+    def wrap(self, generator, key):
+        def wrapped(machine, n, *args, **kwargs):
+            return iter(self.fetch((key, n), lambda: list(generator(machine, n, *args, **kwargs))))
+        return wrapped
 
 class Track:
 
+    """
+    - tracks are copy- on- write; clone() is shallow, so pattern, groove, seeds and sounds are shared with the original
+    - mutate_* methods therefore never write into those structures in place, but rebind them to fresh copies
+    - Tracks.mutate_attr clones the chosen track before mutating it, so cloning a project costs one Track per mutation rather than one per track
+    - tracks use __slots__, and pattern and groove are interned Specs, since every loaded commit keeps all of its tracks alive
+    - loaded tracks hold their sounds as interned Specs too, since sound objects are mutable and can't safely be shared; init_machine() spawns fresh sound objects from them for each render
+    """
+
+    __slots__ = ["name", "machine", "pattern", "groove", "seeds", "temperature", "density", "sounds"]
+
     @staticmethod
-    def randomise(track, sounds, n_sounds, seed_keys="fx|volume|beat|sound".split("|")):
-        seeds = {key: random_seed() for key in seed_keys}
+    def randomise(track, sounds, n_sounds, seed_keys="fx|volume|beat|sound".split("|"), rand = random):
+        seeds = {key: random_seed(rand) for key in seed_keys}
         track_sounds = sounds[track["name"]]
-        random.shuffle(track_sounds)
+        rand.shuffle(track_sounds)
         track_sounds = track_sounds[:n_sounds]
         return Track(name = track["name"],
                      machine = track["machine"],
-                     pattern = random_pattern(),
-                     groove =  random_groove(),
+                     pattern = random_pattern(rand),
+                     groove =  random_groove(rand),
                      seeds =  seeds,
                      temperature =  track["temperature"],
                      density = track["density"],
@@ -49,16 +164,24 @@ class Track:
 
     @staticmethod
     def from_json(track):
-        sound_class = load_class(track["machine"].replace("Machine", "Sound"))
-        sound_instances = [sound_class(**sound) for sound in track["sounds"]]
-        track["sounds"] = sound_instances
-        return Track(**track)
+        validate_spec(track["pattern"])
+        validate_spec(track["groove"])
+        sound_class(track["machine"])
+        return Track(name = track["name"],
+                     machine = track["machine"],
+                     pattern = track["pattern"],
+                     groove = track["groove"],
+                     seeds = track["seeds"],
+                     temperature = track["temperature"],
+                     density = track["density"],
+                     sounds = [Spec.intern(sound)
+                               for sound in track["sounds"]])
 
     def __init__(self, name, machine, pattern, groove, seeds, temperature, density, sounds):
         self.name = name
         self.machine = machine
-        self.pattern = pattern
-        self.groove = groove
+        self.pattern = Spec.intern(pattern)
+        self.groove = Spec.intern(groove)
         self.seeds = seeds
         self.temperature = temperature
         self.density = density
@@ -68,58 +191,73 @@ class Track:
         return Track(
             name = self.name,
             machine = self.machine,
-            pattern = copy.deepcopy(self.pattern),
-            groove = copy.deepcopy(self.groove),
-            seeds = copy.deepcopy(self.seeds),
+            pattern = self.pattern,
+            groove = self.groove,
+            seeds = self.seeds,
             temperature = self.temperature,
             density = self.density,
-            sounds = [sound.clone() for sound in self.sounds]
+            sounds = self.sounds
         )
 
-    def mutate_pattern(self, **kwargs):
-        self.pattern = random_pattern()
+    @property
+    def hash(self):
+        return content_hash(self.to_json())
 
-    def mutate_groove(self, **kwargs):
-        self.groove = random_groove()
+    def mutate_pattern(self, rand = random, **kwargs):
+        self.pattern = random_pattern(rand)
 
-    def mutate_seeds(self, **kwargs):
-        key = random.choice(list(self.seeds.keys()))
-        self.seeds[key] = random_seed()
+    def mutate_groove(self, rand = random, **kwargs):
+        self.groove = random_groove(rand)
 
-    def mutate_temperature(self, **kwargs):
-        self.temperature = random.random()
+    def mutate_seeds(self, rand = random, **kwargs):
+        key = rand.choice(list(self.seeds.keys()))
+        self.seeds = {**self.seeds, key: random_seed(rand)}
 
-    def mutate_density(self, **kwargs):
-        self.density = random.random()
+    def mutate_temperature(self, rand = random, **kwargs):
+        self.temperature = rand.random()
 
-    def mutate_sounds(self, sounds, **kwargs):
-        i = int(random.random() > 0.5)
-        self.sounds[i] = random.choice(sounds[self.name])
+    def mutate_density(self, rand = random, **kwargs):
+        self.density = rand.random()
+
+    def mutate_sounds(self, sounds, rand = random, **kwargs):
+        i = int(rand.random() > 0.5)
+        track_sounds = list(self.sounds)
+        track_sounds[i] = rand.choice(sounds[self.name])
+        self.sounds = track_sounds
 
     def init_machine(self, container, colour):
-        machine_class = load_class(self.machine)
-        return machine_class(
+        klass = sound_class(self.machine)
+        return machine_class(self.machine)(
             container=container,
             namespace=self.name.capitalize(),
             colour=colour,
-            sounds=self.sounds
+            sounds=[klass(**sound.thaw()) if isinstance(sound, Spec) else sound
+                    for sound in self.sounds]
         )
 
-    def render(self, container, generators, dry_level, colour, bpm, tpb, wet_level=1):
-        machine = self.init_machine(container, colour)
-        container.add_machine(machine)
-        pattern = spawn_function(**self.pattern)(**self.pattern["args"])
-        groove = spawn_function(**self.groove)
-        env = {
+    def render_env(self, dry_level, bpm, tpb, wet_level=1):
+        return {
             "dry_level": dry_level,
             "wet_level": wet_level,
             "temperature": self.temperature,
             "density": self.density,
-            "pattern": pattern,
-            "groove": groove,
+            "pattern": spawn_pattern(self.pattern["mod"], self.pattern["fn"], **self.pattern["args"]),
+            "groove": spawn_groove(**self.groove),
             "bpm": bpm,
             "tpb": tpb
         }
+
+    def render(self, container, generators, dry_level, colour, bpm, tpb, wet_level=1, cache=None):
+        machine = self.init_machine(container, colour)
+        container.add_machine(machine)
+        env = self.render_env(dry_level = dry_level,
+                              wet_level = wet_level,
+                              bpm = bpm,
+                              tpb = tpb)
+        if cache is not None:
+            track_hash = self.hash
+            generators = [cache.wrap(generator, key = (track_hash, generator.__name__, dry_level, wet_level, bpm, tpb))
+                          for generator in generators]
         for generator in generators:
             machine.render(generator=generator, seeds=self.seeds, env=env)
 
@@ -127,23 +265,25 @@ class Track:
         return {
             "name": self.name,
             "machine": self.machine,
-            "pattern": self.pattern,
-            "groove": self.groove,
+            "pattern": self.pattern.to_json(),
+            "groove": self.groove.to_json(),
             "seeds": self.seeds,
             "temperature": self.temperature,
             "density": self.density,
-            "sounds": [sound.as_dict() for sound in self.sounds]
+            "sounds": [sound.to_json() if isinstance(sound, Spec) else sound.as_dict()
+                       for sound in self.sounds]
         }
 
 class Tracks(list):
 
     @staticmethod
-    def randomise(tracks, sounds, n_sounds):
+    def randomise(tracks, sounds, n_sounds, rand = random):
         track_instances = []
         for track in tracks:
             track_instance = Track.randomise(track = track,
                                              sounds = sounds,
-                                             n_sounds = n_sounds)
+                                             n_sounds = n_sounds,
+                                             rand = rand)
             track_instances.append(track_instance)        
         return Tracks(track_instances)
 
@@ -159,17 +299,19 @@ class Tracks(list):
         list.__init__(self, tracks if tracks else [])
 
     def clone(self):
-        return Tracks([track.clone() for track in self])
+        return Tracks(self)
 
-    def mutate_attr(self, attr, filter_fn = lambda x: True, **kwargs):
-        tracks = [track for track in self
-                  if filter_fn(track)]
-        if tracks == []:
+    def mutate_attr(self, attr, filter_fn = lambda x: True, rand = random, **kwargs):
+        indexes = [i for i, track in enumerate(self)
+                   if filter_fn(track)]
+        if indexes == []:
             raise RuntimeError("no tracks found to mutate")
-        track = random.choice(tracks)
-        getattr(track, f"mutate_{attr}")(**kwargs)
+        i = rand.choice(indexes)
+        self[i] = track = self[i].clone()
+        getattr(track, f"mutate_{attr}")(rand = rand, **kwargs)
 
     def render(self, container, generators, levels, colours, bpm, tpb,
+               cache = None,
                default_colour = DefaultColour,
                default_level = 1):
         for track in self:
@@ -180,7 +322,8 @@ class Tracks(list):
                          dry_level = level,
                          colour = colour,
                          bpm = bpm,
-                         tpb = tpb)
+                         tpb = tpb,
+                         cache = cache)
         
     def to_json(self):
         return [track.to_json()
@@ -205,19 +348,25 @@ class Patch:
         return Patch(tracks = self.tracks.clone(),
                      frozen = self.frozen)
 
-    def mutate_attr(self, attr, filter_fn = lambda x: True, **kwargs):
+    @property
+    def hash(self):
+        return content_hash([track.hash for track in self.tracks])
+
+    def mutate_attr(self, attr, filter_fn = lambda x: True, rand = random, **kwargs):
         self.tracks.mutate_attr(attr = attr,
                                 filter_fn = filter_fn,
+                                rand = rand,
                                 **kwargs)
 
-    def render(self, container, generators, levels, machine_colours, patch_colour, bpm, tpb):
+    def render(self, container, generators, levels, machine_colours, patch_colour, bpm, tpb, cache = None):
         container.spawn_patch(patch_colour)
         self.tracks.render(container = container,
                            generators = generators,
                            levels = levels,
                            colours = machine_colours,
                            bpm = bpm,
-                           tpb = tpb)
+                           tpb = tpb,
+                           cache = cache)
         
     def to_json(self):
         return {"tracks": self.tracks.to_json(),
@@ -226,10 +375,11 @@ class Patch:
 class Patches(list):
 
     @staticmethod
-    def randomise(tracks, sounds, n_patches, n_sounds):
+    def randomise(tracks, sounds, n_patches, n_sounds, rand = random):
         return Patches([Patch.randomise(tracks = tracks,
                                         sounds = sounds,
-                                        n_sounds = n_sounds)
+                                        n_sounds = n_sounds,
+                                        rand = rand)
                         for i in range(n_patches)])
 
     @staticmethod
@@ -243,6 +393,7 @@ class Patches(list):
         return Patches([patch.clone() for patch in self])
         
     def render(self, container, generators, levels, colours, bpm, tpb,
+               cache = None,
                default_colour = DefaultColour):
         for i, patch in enumerate(self):
             machine_colours = colours["machines"] if "machines" in colours else {}
@@ -253,7 +404,8 @@ class Patches(list):
                          machine_colours = machine_colours,
                          patch_colour = patch_colour,
                          bpm = bpm,
-                         tpb = tpb)
+                         tpb = tpb,
+                         cache = cache)
 
     def freeze(self, n):
         for i, patch in enumerate(self):
@@ -278,7 +430,8 @@ class Project:
 
     def render(self, banks, generators, bpm, tpb, n_ticks,
                levels = {},
-               colours = {}):
+               colours = {},
+               cache = None):
         container = SVContainer(banks = banks,
                                 bpm = bpm,
                                 tpb = tpb,
@@ -288,7 +441,8 @@ class Project:
                             levels = levels,
                             colours = colours,
                             bpm = bpm,
-                            tpb = tpb)
+                            tpb = tpb,
+                            cache = cache)
         return container
 
     def freeze_patches(self, n):
@@ -1,25 +1,55 @@
-from functools import wraps
+from functools import lru_cache, wraps
 
 import logging
 
 """
 - https://stackoverflow.com/questions/7331462/check-if-a-string-is-a-possible-abbrevation-for-a-name
+- an abbreviation matches if its first character starts the text, and each subsequent character is found either later in the current word or at the start of a later word
+- Abbrev precompiles, for every position in an option, the span of the current word and the start of the next one, then evaluates all positions for one abbreviation character at a time (O(len(abbrev) * len(text)) rather than exponential backtracking)
 """
 
+class Abbrev:
+
+    def __init__(self, text):
+        self.text = text.lower()
+        n = len(self.text)
+        starts, ends = [n] * (n + 1), [n] * (n + 1)
+        for p in range(n - 1, -1, -1):
+            space = self.text[p].isspace()
+            starts[p] = starts[p + 1] if space else p
+            ends[p] = p if space else ends[p + 1]
+        self.word_ends = [p + ends[starts[p]] - starts[p] for p in range(n + 1)]
+        self.next_words = [starts[ends[starts[p]]] for p in range(n + 1)]
+
+    def matches(self, abbrev):
+        abbrev = abbrev.lower()
+        n = len(self.text)
+        row = [True] * (n + 1)
+        for c in reversed(abbrev):
+            counts = [0]
+            for ok in row:
+                counts.append(counts[-1] + ok)
+            row = [p < n and
+                   self.text[p] == c and
+                   (row[self.next_words[p]] or
+                    counts[self.word_ends[p] + 1] > counts[p + 1])
+                   for p in range(n + 1)]
+        return row[0]
+
+@lru_cache(maxsize = 1024)
+def compile_abbrev(text):
+    return Abbrev(text)
+
 def is_abbrev(abbrev, text):
-    abbrev=abbrev.lower()
-    text=text.lower()
-    words=text.split()
-    if not abbrev:
-        return True
-    if abbrev and not text:
-        return False
-    if abbrev[0]!=text[0]:
-        return False
-    else:
-        return (is_abbrev(abbrev[1:],' '.join(words[1:])) or
-                any(is_abbrev(abbrev[1:],text[i+1:])
-                    for i in range(len(words[0]))))
+    return compile_abbrev(text).matches(abbrev)
+
+@lru_cache(maxsize = 1024)
+def find_enum(value, options):
+    for option in options:
+        if (value == option or
+            is_abbrev(value, option)):
+            return option
+    return None
 
 def matches_number(value, **kwargs):
     try:
@@ -38,11 +68,7 @@ def matches_str(value, **kwargs):
     return True
 
 def matches_enum(value, options=None, **kwargs):
-    for option in options:
-        if (value == option or
-            is_abbrev(value, option)):
-            return True
-    return False
+    return find_enum(value, tuple(options)) is not None
 
 def matches_hexstr(value, **kwargs):
     for c in value:
@@ -66,31 +92,60 @@ def parse_hexstr(value, **kwargs):
     return [int(c, 16) for c in value]
 
 def parse_enum(value, options=None, **kwargs):
-    for option in options:
-        if (value == option or
-            is_abbrev(value, option)):
-            return option
+    option = find_enum(value, tuple(options))
+    if option is not None:
+        return option
     raise RuntimeError(f"'{value}' is not a valid option. Available options: {options}")
 
+Types = {type_name: (globals()[f"matches_{type_name}"], globals()[f"parse_{type_name}"])
+         for type_name in ["number", "int", "float", "str", "enum", "hexstr"]}
+
+class Item:
+
+    """
+    - an item with a `default` is optional; string defaults are parsed with the item's type (and so validated) at decoration time, other defaults are used as- is
+    """
+
+    def __init__(self, name, type, **kwargs):
+        if type not in Types:
+            raise RuntimeError(f"Unsupported type: {type}")
+        self.name = name
+        self.matcher_fn, self.parser_fn = Types[type]
+        self.optional = "default" in kwargs
+        default = kwargs.pop("default", None)
+        self.kwargs = kwargs
+        self.default = self.parse(default) if isinstance(default, str) else default
+
+    def parse(self, value):
+        if not self.matcher_fn(value, **self.kwargs):
+            raise RuntimeError(f"{self.name} is invalid")
+        return self.parser_fn(value, **self.kwargs)
+
+class LineParser:
+
+    def __init__(self, items):
+        self.items = [Item(**item) for item in items]
+        self.required = [item for item in self.items if not item.optional]
+        if self.items[:len(self.required)] != self.required:
+            raise RuntimeError("Optional items must follow required items")
+
+    def parse(self, line):
+        args = line.split()
+        if len(args) < len(self.required):
+            raise RuntimeError("Please enter " + ", ".join([item.name for item in self.required]))
+        kwargs = {item.name: item.parse(arg_val)
+                  for item, arg_val in zip(self.items, args)}
+        for item in self.items[len(args):]:
+            kwargs[item.name] = item.default
+        return kwargs
+
 def parse_line(items = []):
+    parser = LineParser(items)
     def decorator(fn):
         @wraps(fn)
         def wrapped(self, line, **kwargs):
             try:
-                args = [tok for tok in line.split(" ") if tok != '']
-                if len(args) < len(items):
-                    raise RuntimeError("Please enter " + ", ".join([item["name"] for item in items]))
-
-                for item, arg_val in zip(items, args[:len(items)]):
-                    matcher_fn = globals().get(f"matches_{item['type']}")
-                    parser_fn = globals().get(f"parse_{item['type']}")
-                    if not matcher_fn or not parser_fn:
-                        raise RuntimeError(f"Unsupported type: {item['type']}")
-
-                    if not matcher_fn(arg_val, **item):
-                        raise RuntimeError(f"{item['name']} is invalid")
-
-                    kwargs[item["name"]] = parser_fn(arg_val, **item)
+                kwargs.update(parser.parse(line))
                 return fn(self, **kwargs)
             except RuntimeError as error:
                 logging.error(str(error))
@@ -98,4 +153,3 @@ def parse_line(items = []):
                 logging.error("Unhandled exception", exc_info = True)
         return wrapped
     return decorator
-
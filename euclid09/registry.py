@@ -0,0 +1,69 @@
+from sv.project import load_class
+
+import sv.algos.euclid as euclid
+import sv.algos.groove.perkons as perkons
+
+from functools import lru_cache
+
+import importlib
+
+"""
+- class paths are resolved once per process; tracks only ever refer to a handful of machine and sound classes, but from_json and render would otherwise resolve them for every track of every patch of every commit
+- validate_tracks() resolves every class a tracks config refers to, so a bad path in tracks.yaml fails at startup rather than on first render or load
+- pattern and groove specs name a function as {"mod", "fn"}; mod is looked up in Modules rather than eval'd, so a commit loaded from disk can only reach functions in registered modules
+- plugin modules are added with register_module(), which takes a module or an import path
+- caches keyed on {"mod", "fn"} elsewhere (eg model.spawn_pattern) are added to Caches with register_cache(), so register_module() clears them along with resolve_function's
+"""
+
+Modules = {"euclid": euclid,
+           "perkons": perkons}
+
+TrackKeys = ["name", "machine", "temperature", "density"]
+
+Caches = []
+
+@lru_cache(maxsize = None)
+def resolve_class(path):
+    try:
+        return load_class(path)
+    except (ImportError, AttributeError, ValueError) as error:
+        raise RuntimeError(f"Unable to load class {path}: {error}")
+
+def machine_class(machine):
+    return resolve_class(machine)
+
+def sound_class(machine):
+    return resolve_class(machine.replace("Machine", "Sound"))
+
+def register_cache(fn):
+    Caches.append(fn)
+    return fn
+
+def register_module(name, module):
+    Modules[name] = importlib.import_module(module) if isinstance(module, str) else module
+    resolve_function.cache_clear()
+    for cache in Caches:
+        cache.cache_clear()
+
+@lru_cache(maxsize = None)
+def resolve_function(mod, fn):
+    if mod not in Modules:
+        raise RuntimeError(f"Unknown function module: {mod}")
+    function = getattr(Modules[mod], fn, None) if not fn.startswith("_") else None
+    if not callable(function):
+        raise RuntimeError(f"Unknown function: {mod}.{fn}")
+    return function
+
+def validate_spec(spec):
+    resolve_function(spec["mod"], spec["fn"])
+
+def validate_tracks(tracks):
+    for track in tracks:
+        for key in TrackKeys:
+            if key not in track:
+                raise RuntimeError(f"Track {track.get('name', '?')} is missing {key}")
+        machine_class(track["machine"])
+        sound_class(track["machine"])
+
+if __name__ == "__main__":
+    pass
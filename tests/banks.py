@@ -0,0 +1,82 @@
+from euclid09.cli.banks import MappedFile, decode_bank, load_mapped_banks
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+class BanksTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.root_dir, "banks")
+        self.decoded_dir = os.path.join(self.root_dir, "decoded")
+        os.makedirs(self.cache_dir)
+        self.samples = {f"{name}.wav": name.encode() * 256 for name in ["kick", "snare", "hat"]}
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def write_bank(self, file_name, compression=zipfile.ZIP_DEFLATED):
+        zip_path = os.path.join(self.cache_dir, file_name)
+        with zipfile.ZipFile(zip_path, "w", compression) as zip_file:
+            for name, data in self.samples.items():
+                zip_file.writestr(name, data)
+        return zip_path
+
+    def test_decode_bank(self):
+        zip_path = self.write_bank("drums.zip")
+        decoded_path = decode_bank(zip_path, self.decoded_dir)
+        self.assertEqual(decoded_path, os.path.join(self.decoded_dir, "drums.zip"))
+        with zipfile.ZipFile(decoded_path) as zip_file:
+            self.assertEqual({info.compress_type for info in zip_file.infolist()}, {zipfile.ZIP_STORED})
+            self.assertEqual({name: zip_file.read(name) for name in zip_file.namelist()}, self.samples)
+        self.assertEqual(os.listdir(self.decoded_dir), ["drums.zip"])
+
+    def test_decode_bank_uses_stored_zips_in_place(self):
+        zip_path = self.write_bank("drums.zip", compression=zipfile.ZIP_STORED)
+        self.assertEqual(decode_bank(zip_path, self.decoded_dir), zip_path)
+        self.assertFalse(os.path.exists(self.decoded_dir))
+
+    def test_decode_bank_reuses_decoded_copy(self):
+        zip_path = self.write_bank("drums.zip")
+        decoded_path = decode_bank(zip_path, self.decoded_dir)
+        mtime = os.path.getmtime(zip_path)
+        os.utime(zip_path, (mtime - 200, mtime - 200))
+        os.utime(decoded_path, (mtime - 100, mtime - 100))
+        decode_bank(zip_path, self.decoded_dir)
+        self.assertEqual(os.path.getmtime(decoded_path), mtime - 100)
+        os.utime(zip_path, (mtime - 50, mtime - 50))
+        decode_bank(zip_path, self.decoded_dir)
+        self.assertGreater(os.path.getmtime(decoded_path), mtime - 50)
+
+    def test_mapped_file_pickles_by_path(self):
+        zip_path = self.write_bank("drums.zip", compression=zipfile.ZIP_STORED)
+        mapped = MappedFile(zip_path)
+        data = pickle.dumps(mapped)
+        self.assertLess(len(data), os.path.getsize(zip_path))
+        remapped = pickle.loads(data)
+        self.assertIsInstance(remapped, MappedFile)
+        self.assertEqual(remapped.path, zip_path)
+        self.assertEqual(remapped[:], mapped[:])
+
+    def test_mapped_file_getvalue_is_a_view(self):
+        zip_path = self.write_bank("drums.zip", compression=zipfile.ZIP_STORED)
+        mapped = MappedFile(zip_path)
+        value = mapped.getvalue()
+        self.assertIsInstance(value, memoryview)
+        with open(zip_path, "rb") as file:
+            self.assertEqual(value, file.read())
+
+    def test_load_mapped_banks(self):
+        self.write_bank("drums.zip")
+        banks = load_mapped_banks(cache_dir=self.cache_dir, decoded_dir=self.decoded_dir)
+        self.assertEqual([bank.name for bank in banks], ["drums"])
+        self.assertIsInstance(banks[0].zip_buffer, MappedFile)
+        with zipfile.ZipFile(banks[0].zip_buffer) as zip_file:
+            self.assertEqual(zip_file.read("kick.wav"), self.samples["kick.wav"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+from euclid09.cli.batch import interactive, load_script, run_script
+
+from unittest.mock import patch
+
+import cmd
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+class MockCLI(cmd.Cmd):
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def preloop(self):
+        self.calls.append("preloop")
+
+    def flush(self):
+        self.calls.append("flush")
+
+    def do_add(self, arg):
+        self.calls.append(f"add {arg}")
+
+    @interactive
+    def do_ask(self, _):
+        self.calls.append(input())
+
+    def do_quit(self, _):
+        return True
+
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def write_script(self, file_name, text):
+        path = os.path.join(self.root_dir, file_name)
+        with open(path, "w") as file:
+            file.write(text)
+        return path
+
+    def test_load_text_script(self):
+        path = self.write_script("job.txt", "# comment\nadd 1\n\n  add 2  \n")
+        self.assertEqual(load_script(path), {"commands": ["add 1", "add 2"], "defer": False})
+
+    def test_load_yaml_script(self):
+        path = self.write_script("job.yaml", "commands:\n  - add 1\n  - add 2\ndefer: true\n")
+        self.assertEqual(load_script(path), {"commands": ["add 1", "add 2"], "defer": True})
+        with self.assertRaises(RuntimeError):
+            load_script(self.write_script("bad.yaml", "- add 1\n"))
+
+    def test_load_script_from_stdin(self):
+        with patch("sys.stdin", io.StringIO("commands:\n  - add 1\ndefer: true\n")):
+            self.assertEqual(load_script("-"), {"commands": ["add 1"], "defer": True})
+        with patch("sys.stdin", io.StringIO("add 1\nadd 2\n")):
+            self.assertEqual(load_script("-"), {"commands": ["add 1", "add 2"], "defer": False})
+
+    def test_run_script(self):
+        cli = MockCLI()
+        timings = run_script(cli, ["add 1", "add 2", "quit", "add 3"])
+        self.assertEqual(cli.calls, ["preloop", "add 1", "add 2", "flush"])
+        self.assertEqual([command for command, _ in timings], ["add 1", "add 2", "quit", "flush"])
+
+    def test_run_script_rejects_interactive_commands(self):
+        cli = MockCLI()
+        with self.assertRaises(RuntimeError):
+            run_script(cli, ["add 1", "ask"])
+        self.assertEqual(cli.calls, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+from euclid09.catalogue import GrooveFunctions, GrooveNames, Mask, Masks, TidalPatterns, bjorklund_mask
+from euclid09.model import spawn_groove
+
+import sv.algos.euclid as euclid
+import sv.algos.groove.perkons as perkons
+
+from unittest.mock import patch
+
+import inspect
+import unittest
+
+class CatalogueTest(unittest.TestCase):
+
+    def test_masks_match_bjorklund(self):
+        for pulses, steps in [pattern[:2] for pattern in TidalPatterns]:
+            pattern = euclid.bjorklund(pulses=pulses, steps=steps)
+            mask = Masks[(pulses, steps)]
+            self.assertIsInstance(mask, Mask)
+            self.assertEqual(len(mask), steps)
+            self.assertEqual([bool(mask(i)) for i in range(2 * steps)],
+                             [bool(pattern(i)) for i in range(2 * steps)])
+
+    def test_bjorklund_mask_is_cached(self):
+        pulses, steps = TidalPatterns[0][:2]
+        self.assertIs(bjorklund_mask(pulses, steps), Masks[(pulses, steps)])
+        self.assertIs(bjorklund_mask(3, 11), bjorklund_mask(3, 11))
+
+    def test_groove_names_order(self):
+        self.assertEqual(list(GrooveNames),
+                         [name for name, _ in inspect.getmembers(perkons, inspect.isfunction)])
+
+    @patch("euclid09.model.resolve_function")
+    def test_spawn_groove_uses_table(self, mock_resolve_function):
+        for name in GrooveNames:
+            self.assertIs(spawn_groove(mod="perkons", fn=name), GrooveFunctions[name])
+        mock_resolve_function.assert_not_called()
+        spawn_groove(mod="plugin", fn="swing")
+        mock_resolve_function.assert_called_once_with("plugin", "swing")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+from euclid09.cli import Euclid09CLI
+from euclid09.cli.batch import run_script
+from euclid09.generators import Beat, GhostEcho
+from euclid09.git import Git
+
+from tests.fixtures import detroit_sounds, detroit_tracks
+
+from unittest.mock import Mock, patch
+
+import os
+import shutil
+import tempfile
+import unittest
+
+class CLITest(unittest.TestCase):
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.tracks = detroit_tracks()
+        pools = detroit_sounds(self.tracks)
+        self.sounds = Mock(banks=None)
+        self.sounds.render = Mock(side_effect=lambda: {name: list(pool) for name, pool in pools.items()})
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def run_commands(self, commands, seed=1, defer=False, content=False):
+        root_dir = tempfile.mkdtemp(dir=self.root_dir)
+        with patch.object(Euclid09CLI, "init_git", lambda cli: Git(root_dir)), \
+             patch.object(Euclid09CLI, "write_project"), \
+             patch("euclid09.model.Project.render", return_value=Mock()):
+            cli = Euclid09CLI(tracks=self.tracks,
+                              sounds=self.sounds,
+                              generators=[Beat, GhostEcho],
+                              bpm=120,
+                              tpb=1,
+                              n_patches=8,
+                              n_ticks=16,
+                              seed=seed,
+                              defer=defer)
+            for command in commands:
+                cli.onecmd(command)
+            cli.flush()
+        return [commit.content if content else commit.content.to_json()
+                for commit in cli.git.commits]
+
+    def test_seeded_commits_are_independent_of_defer(self):
+        commands = ["randomise_patches", "mutate_patterns 1", "mutate_sounds 1"]
+        self.assertEqual(self.run_commands(commands, defer=False),
+                         self.run_commands(commands, defer=True))
+
+    def test_select_best_mutates_frozen_roots(self):
+        commits = self.run_commands(["randomise_patches", "select_best 2", "select_best 2"],
+                                    content=True)
+        self.assertEqual(len(commits), 3)
+        for project in commits[1:]:
+            hashes = [patch.hash for patch in project.patches]
+            self.assertEqual([patch.frozen for patch in project.patches], [True] * 2 + [False] * 6)
+            self.assertFalse(set(hashes[:2]) & set(hashes[2:]))
+            self.assertEqual(len(set(hashes[2:])), 6)
+
+    def test_git_import_rejects_missing_directory(self):
+        missing = os.path.join(self.root_dir, "missing")
+        with self.assertLogs(level="ERROR"):
+            self.run_commands([f"git_import {missing}"])
+        self.assertFalse(os.path.exists(missing))
+
+    def test_run_script_flushes_deferred_renders(self):
+        with patch.object(Euclid09CLI, "init_git", lambda cli: Git(self.root_dir)), \
+             patch.object(Euclid09CLI, "write_project") as mock_write_project, \
+             patch("euclid09.model.Project.render", return_value=Mock()):
+            cli = Euclid09CLI(tracks=self.tracks,
+                              sounds=self.sounds,
+                              generators=[Beat, GhostEcho],
+                              bpm=120,
+                              tpb=1,
+                              n_patches=4,
+                              n_ticks=16,
+                              seed=1,
+                              defer=True)
+            writes_before_flush = []
+            flush = cli.flush
+            cli.flush = lambda: (writes_before_flush.append(mock_write_project.call_count), flush())
+            run_script(cli, ["randomise_patches", "mutate_patterns 1"])
+            self.assertEqual(writes_before_flush, [0])
+            self.assertEqual([call.args[1] for call in mock_write_project.call_args_list],
+                             [commit.commit_id for commit in cli.git.commits])
+            self.assertEqual(cli.deferred_renders, [])
+
+if __name__ == "__main__":
+    unittest.main()
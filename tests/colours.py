@@ -2,6 +2,7 @@ from euclid09.colours import Colour, Colours
 
 from unittest.mock import patch
 
+import random
 import unittest
 
 class ColoursTest(unittest.TestCase):
@@ -40,6 +41,12 @@ class ColoursTest(unittest.TestCase):
         self.assertEqual(len(colours["machines"]), len(tracks))
         self.assertEqual(len(colours["patches"]), len(patches))
 
+    def test_colours_randomise_seeded(self):
+        tracks = [{"name": "track1"}, {"name": "track2"}]
+        patches = [{"id": i} for i in range(6)]
+        self.assertEqual(Colours.randomise(tracks, patches, rand=random.Random(1)),
+                         Colours.randomise(tracks, patches, rand=random.Random(1)))
+
     def test_colour_randomise_raises_runtime_error(self):
         with patch("random.random", return_value=0): 
             with self.assertRaises(RuntimeError):
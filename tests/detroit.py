@@ -0,0 +1,97 @@
+from euclid09.cli import Euclid09CLI
+from euclid09.cli.factories import detroit
+from euclid09.cli.sounds import Sounds
+from euclid09.generators import Beat
+from euclid09.git import Git
+
+from unittest.mock import Mock, patch
+
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+class DetroitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.root_dir, "banks")
+        self.index_dir = os.path.join(self.root_dir, "index")
+        os.makedirs(self.cache_dir)
+        self.write_bank("drums.zip", ["kick.wav"])
+        self.tracks = [{"name": name,
+                        "machine": "sv.machines.beats.detroit.DetroitMachine",
+                        "tag": tag,
+                        "temperature": 0.5,
+                        "density": 0.5}
+                       for name, tag in [("kick", "kick"), ("clap", "clap")]]
+        detroit.Indexes.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+        detroit.Indexes.clear()
+
+    def write_bank(self, file_name, names):
+        with zipfile.ZipFile(os.path.join(self.cache_dir, file_name), "w") as zip_file:
+            for name in names:
+                zip_file.writestr(name, name)
+
+    def load_index(self, terms={"kick": "(kick)"}):
+        detroit.Indexes.clear()
+        return detroit.load_index(terms,
+                                  cache_dir=self.cache_dir,
+                                  index_dir=self.index_dir)
+
+    @patch("euclid09.cli.factories.detroit.load_banks")
+    def test_banks_are_loaded_on_first_use(self, mock_load_banks):
+        mock_load_banks.return_value = [Mock()]
+        sounds = Sounds(tracks=self.tracks, cutoff=250)
+        with patch.object(Euclid09CLI, "init_git", lambda cli: Git(self.root_dir)):
+            cli = Euclid09CLI(tracks=self.tracks,
+                              sounds=sounds,
+                              generators=[Beat],
+                              bpm=120,
+                              tpb=1,
+                              n_patches=4,
+                              n_ticks=16)
+            cli.preloop()
+        cli.onecmd("randomise_mapping")
+        cli.onecmd("show_mapping")
+        mock_load_banks.assert_not_called()
+        self.assertEqual(sounds.banks, mock_load_banks.return_value)
+        mock_load_banks.assert_called()
+        n_calls = mock_load_banks.call_count
+        sounds.banks
+        self.assertEqual(mock_load_banks.call_count, n_calls)
+
+    @patch("euclid09.cli.factories.detroit.load_banks")
+    @patch("euclid09.cli.factories.detroit.build_index", return_value={"kick": [{"bank_name": "drums", "file_path": "kick.wav"}]})
+    def test_index_is_persisted(self, mock_build_index, mock_load_banks):
+        index = self.load_index()
+        self.assertEqual(self.load_index(), index)
+        mock_build_index.assert_called_once()
+        mock_load_banks.assert_called_once()
+
+    @patch("euclid09.cli.factories.detroit.load_banks")
+    @patch("euclid09.cli.factories.detroit.build_index", return_value={})
+    def test_index_is_rebuilt_when_stale(self, mock_build_index, mock_load_banks):
+        self.load_index()
+        bank_path = os.path.join(self.cache_dir, "drums.zip")
+        mtime = os.path.getmtime(bank_path)
+        os.utime(bank_path, (mtime + 10, mtime + 10))
+        self.load_index()
+        self.assertEqual(mock_build_index.call_count, 2)
+        self.write_bank("drums.zip", ["kick.wav", "snare.wav"])
+        os.utime(bank_path, (mtime + 10, mtime + 10))
+        self.load_index()
+        self.assertEqual(mock_build_index.call_count, 3)
+        self.load_index(terms={"kick": "(kick)|(bd)"})
+        self.assertEqual(mock_build_index.call_count, 4)
+        self.load_index()
+        self.assertEqual(mock_build_index.call_count, 4)
+        self.assertEqual([file_name for file_name in os.listdir(self.index_dir)
+                          if file_name.endswith(".tmp")], [])
+
+if __name__ == "__main__":
+    unittest.main()
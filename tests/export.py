@@ -0,0 +1,186 @@
+from euclid09.cli import Euclid09CLI, export
+from euclid09.cli.export import StemCache, export_stems, write_stem
+from euclid09.cli.levels import Levels
+from euclid09.generators import Beat, GhostEcho
+from euclid09.model import Project, content_hash
+
+from tests.fixtures import detroit_sounds, detroit_tracks
+
+from unittest.mock import Mock, patch
+
+import io
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+def fake_render_wav(project, levels, **kwargs):
+    return io.BytesIO(content_hash([project.to_json(), dict(levels)]).encode() * 64)
+
+class ExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.tracks = [{"name": name,
+                        "machine": "sv.machines.beats.detroit.DetroitMachine",
+                        "temperature": 0.5,
+                        "density": 0.5}
+                       for name in ["kick", "clap", "hat"]]
+        self.project = Project.randomise(tracks=self.tracks,
+                                         sounds={track["name"]: [] for track in self.tracks},
+                                         n_patches=2,
+                                         n_sounds=2,
+                                         rand=random.Random(1))
+        self.levels = [Levels(self.tracks)] + [Levels(self.tracks).solo(track["name"]) for track in self.tracks]
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def export_zip(self, n_jobs, compression=zipfile.ZIP_DEFLATED):
+        zip_io = io.BytesIO()
+        with patch("euclid09.cli.export.render_wav", fake_render_wav), \
+             zipfile.ZipFile(zip_io, "w", compression) as zip_file:
+            for levels, wav_io in export_stems(project=self.project,
+                                               banks=None,
+                                               generators=[],
+                                               levels=self.levels,
+                                               bpm=120,
+                                               tpb=1,
+                                               n_ticks=16,
+                                               n_jobs=n_jobs):
+                write_stem(zip_file, f"{levels.short_code}.wav", wav_io)
+        with zipfile.ZipFile(zip_io) as zip_file:
+            return [(name, zip_file.read(name)) for name in zip_file.namelist()]
+
+    def test_parallel_export_matches_serial(self):
+        serial = self.export_zip(n_jobs=1)
+        self.assertEqual(len(serial), len(self.levels))
+        self.assertEqual(self.export_zip(n_jobs=2), serial)
+        self.assertEqual(self.export_zip(n_jobs=3), serial)
+
+    def test_compression_round_trips_wavs(self):
+        stored = self.export_zip(n_jobs=1, compression=zipfile.ZIP_STORED)
+        self.assertEqual(self.export_zip(n_jobs=1, compression=zipfile.ZIP_DEFLATED), stored)
+        self.assertEqual([wav for _, wav in stored],
+                         [fake_render_wav(self.project, levels).getvalue() for levels in self.levels])
+
+class ExportCommitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.root_dir = tempfile.mkdtemp()
+        os.chdir(self.root_dir)
+        self.tracks = detroit_tracks()
+        self.sounds = Mock(banks=None)
+        self.sounds.render = Mock(side_effect=lambda: detroit_sounds(self.tracks))
+        for patcher in [patch("euclid09.cli.export.render_wav", side_effect=fake_render_wav),
+                        patch.object(Euclid09CLI, "write_project"),
+                        patch("euclid09.model.Project.render", return_value=Mock())]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.cli = self.spawn_cli()
+        self.cli.onecmd("randomise_patches")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.root_dir)
+
+    def spawn_cli(self, **kwargs):
+        return Euclid09CLI(tracks=self.tracks,
+                           sounds=self.sounds,
+                           generators=[Beat, GhostEcho],
+                           bpm=120,
+                           tpb=1,
+                           n_patches=2,
+                           n_ticks=16,
+                           seed=1,
+                           **kwargs)
+
+    def zip_name(self):
+        commit_id = self.cli.git.head.commit_id
+        return f"tmp/wav/{commit_id.slug}-120-16.zip"
+
+    def read_zip(self):
+        with zipfile.ZipFile(self.zip_name()) as zip_file:
+            return {name: zip_file.read(name) for name in zip_file.namelist()}
+
+    def test_export_replaces_truncated_zip(self):
+        self.cli.onecmd("export_stems")
+        stems = self.read_zip()
+        with open(self.zip_name(), "r+b") as file:
+            file.truncate(os.path.getsize(self.zip_name()) // 2)
+        with self.assertLogs(level="WARNING"):
+            self.cli.onecmd("export_stems")
+        self.assertEqual(self.read_zip(), stems)
+
+    def test_interrupted_export_keeps_previous_zip(self):
+        self.cli.onecmd("export_stems")
+        stems = self.read_zip()
+        self.cli.compression = "stored"
+        with patch("euclid09.cli.write_stem", side_effect=OSError("interrupted")):
+            with self.assertRaises(OSError):
+                self.cli.export_commit(self.cli.git.head)
+        self.assertEqual(self.read_zip(), stems)
+
+    def test_unchanged_export_is_a_no_op(self):
+        self.cli.onecmd("export_stems")
+        n_renders = export.render_wav.call_count
+        with self.assertLogs(level="INFO") as logs:
+            self.cli.onecmd("export_stems")
+        self.assertTrue(any("is up to date" in line for line in logs.output))
+        self.assertEqual(export.render_wav.call_count, n_renders)
+
+    def test_stems_are_cached(self):
+        self.cli.onecmd("export_stems")
+        n_renders = export.render_wav.call_count
+        self.assertEqual(n_renders, 1 + 2 * len(self.tracks))
+        stems = self.read_zip()
+        os.remove(self.zip_name())
+        self.cli.onecmd("export_stems")
+        self.assertEqual(export.render_wav.call_count, n_renders)
+        self.assertEqual(self.read_zip(), stems)
+
+    def test_child_commit_reuses_silent_stems(self):
+        self.cli.onecmd("export_stems")
+        n_renders = export.render_wav.call_count
+        project = self.cli.git.head.content.clone()
+        project.patches[0].mutate_attr(attr="seeds",
+                                       filter_fn=lambda track: track.name == "kick",
+                                       rand=random.Random(1))
+        self.cli.git.commit(project)
+        self.cli.onecmd("export_stems")
+        # mix, solo kick, mute clap and mute hat change; solo clap, solo hat and mute kick are reused
+        self.assertEqual(export.render_wav.call_count - n_renders, 4)
+
+    def test_verify_settings_change_export_key(self):
+        comments = []
+        for attr, value in [("verify", False), ("verify", True), ("tolerance", 1e-2)]:
+            setattr(self.cli, attr, value)
+            self.cli.onecmd("export_stems")
+            with zipfile.ZipFile(self.zip_name()) as zip_file:
+                comments.append(zip_file.comment)
+        self.assertEqual(len(set(comments)), 3)
+
+    def test_stored_export_matches_deflated(self):
+        self.cli.onecmd("export_stems")
+        stems = self.read_zip()
+        os.remove(self.zip_name())
+        self.cli.compression = "stored"
+        self.cli.onecmd("export_stems")
+        with zipfile.ZipFile(self.zip_name()) as zip_file:
+            self.assertEqual({info.compress_type for info in zip_file.infolist()}, {zipfile.ZIP_STORED})
+        self.assertEqual(self.read_zip(), stems)
+
+    def test_stem_cache_evicts_oldest(self):
+        cache = StemCache("tmp/stems", max_bytes=20)
+        for i, key in enumerate(["a", "b", "c"]):
+            cache.put(key, io.BytesIO(b"0" * 10))
+            os.utime(cache.file_path(key), (1000 * (i + 1), 1000 * (i + 1)))
+        cache.open("a").close()
+        cache.evict()
+        self.assertEqual([key in cache for key in ["a", "b", "c"]], [True, False, True])
+
+if __name__ == "__main__":
+    unittest.main()
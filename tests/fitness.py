@@ -0,0 +1,61 @@
+from euclid09.fitness import Scorers, density_score, overlap_score, rank_patches, score_patch, syncopation_score
+from euclid09.generators import Beat, GhostEcho
+from euclid09.model import Patch
+
+from tests.fixtures import detroit_sounds, detroit_tracks
+
+import random
+import unittest
+
+class FitnessTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tracks = detroit_tracks()
+        self.sounds = detroit_sounds(self.tracks)
+
+    def random_patch(self, seed):
+        return Patch.randomise(tracks=self.tracks,
+                               sounds=self.sounds,
+                               n_sounds=2,
+                               rand=random.Random(seed))
+
+    def test_density_score(self):
+        self.assertEqual(density_score({"kick": set()}, 16), 0)
+        self.assertEqual(density_score({"kick": {0, 4, 8, 12}}, 16), 1)
+        self.assertEqual(density_score({"hat": set(range(16))}, 16), 0)
+
+    def test_syncopation_score(self):
+        self.assertEqual(syncopation_score({"kick": {0, 4, 8, 12}}, 16), 0)
+        self.assertEqual(syncopation_score({"kick": {1, 3, 5, 7}}, 16), 1)
+        self.assertEqual(syncopation_score({"kick": set()}, 16), 0)
+
+    def test_overlap_score(self):
+        self.assertEqual(overlap_score({"kick": {0, 4}, "clap": {0, 4}}, 16), 0)
+        self.assertEqual(overlap_score({"kick": {0, 4}, "clap": {2, 6}}, 16), 1)
+        self.assertEqual(overlap_score({"kick": set(), "clap": set()}, 16), 0)
+
+    def test_score_patch_is_deterministic(self):
+        patch = self.random_patch(1)
+        env = {"generators": [Beat, GhostEcho], "n_ticks": 16, "bpm": 120, "tpb": 1}
+        score = score_patch(patch, **env)
+        self.assertGreaterEqual(score, 0)
+        self.assertLessEqual(score, 1)
+        self.assertEqual(score, score_patch(patch.clone(), **env))
+
+    def test_rank_patches(self):
+        patches = [self.random_patch(seed) for seed in range(8)]
+        ranking, scores = rank_patches(patches, generators=[Beat], n_ticks=16, bpm=120, tpb=1)
+        self.assertEqual(sorted(ranking), list(range(8)))
+        self.assertEqual([scores[i] for i in ranking],
+                         sorted(scores, reverse=True))
+
+    def test_custom_scorers(self):
+        patch = self.random_patch(1)
+        scorers = {**Scorers, "constant": (lambda hits, n_ticks: 1, 0)}
+        env = {"generators": [Beat], "n_ticks": 16, "bpm": 120, "tpb": 1}
+        self.assertAlmostEqual(score_patch(patch, scorers=scorers, **env),
+                               score_patch(patch, **env))
+        self.assertEqual(score_patch(patch, scorers={"constant": (lambda hits, n_ticks: 1, 1)}, **env), 1)
+
+if __name__ == "__main__":
+    unittest.main()
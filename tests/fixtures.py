@@ -0,0 +1,24 @@
+from sv.machines.beats.detroit import DetroitSound
+
+"""
+- tracks and sound pools shared by the tests which generate patches
+- sounds are real DetroitSounds rather than mocks, so that patches pickle (for worker pools) and serialise (for to_json comparisons)
+"""
+
+def detroit_tracks(densities = [("kick", 0.75), ("clap", 0.5), ("hat", 1.0)], temperature = 0.5):
+    return [{"name": name,
+             "machine": "sv.machines.beats.detroit.DetroitMachine",
+             "temperature": temperature,
+             "density": density}
+            for name, density in densities]
+
+def detroit_sounds(tracks, n = 4):
+    return {track["name"]: [DetroitSound(bank_name = "drums",
+                                         file_path = f"{track['name']}-{i}.wav",
+                                         note = 36,
+                                         tags = [track["name"]])
+                            for i in range(n)]
+            for track in tracks}
+
+if __name__ == "__main__":
+    pass
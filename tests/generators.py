@@ -1,4 +1,5 @@
 
+from euclid09.catalogue import bjorklund_mask
 from euclid09.generators import *
 from sv.algos.euclid import bjorklund
 
@@ -32,6 +33,36 @@ class GeneratorTest(unittest.TestCase):
             self.assertEqual(trig_block, "trig_block")
         self.assertTrue(len(output) <= self.n_steps)
 
+    def test_Beat_generator_is_seed_compatible(self):
+        def per_tick_beat(self, n, rand, pattern, groove, temperature, density, dry_level, tpb, **kwargs):
+            for i in range(n):
+                if 0 == i % tpb:
+                    j = int(i / tpb)
+                    volume = groove(rand = rand["volume"], i = j)
+                    if rand["sound"].random() < temperature:
+                        self.toggle_sound()
+                    if (pattern(j) and
+                        rand["beat"].random() < density):
+                        yield i, self.note(volume = volume, level = dry_level)
+        def render(generator, n, pattern, tpb):
+            rand = {key: random.Random(i) for i, key in enumerate(["volume", "sound", "beat"])}
+            mock_self = Mock()
+            mock_self.note = Mock(side_effect=lambda volume, level: (mock_self.toggle_sound.call_count, volume, level))
+            trigs = list(generator(mock_self, n, rand,
+                                   pattern=pattern,
+                                   groove=lambda rand, i: rand.random(),
+                                   temperature=self.temperature,
+                                   density=self.density,
+                                   dry_level=self.dry_level,
+                                   tpb=tpb))
+            return trigs, mock_self.toggle_sound.call_count
+        for n, pattern in [(64, bjorklund(steps=16, pulses=5)),
+                           (64, bjorklund_mask(steps=16, pulses=5)),
+                           (BatchSteps * 4, bjorklund_mask(steps=16, pulses=5)),
+                           (BatchSteps * 4, bjorklund_mask(steps=12, pulses=7))]:
+            for tpb in [1, 2, 4]:
+                self.assertEqual(render(Beat, n, pattern, tpb), render(per_tick_beat, n, pattern, tpb))
+
     def test_GhostEcho_generator(self):
         mock_self = Mock()
         mock_self.modulation = Mock(return_value="echo_trig_block")
@@ -1,5 +1,5 @@
 from euclid09.model import Project
-from euclid09.git import Git, CommitId
+from euclid09.git import Git, CommitId, Codecs, DirStore, LogStore, SharedStore, migrate_store
 
 from unittest.mock import patch, mock_open
 
@@ -30,8 +30,9 @@ class GitTest(unittest.TestCase):
 
     @patch("euclid09.git.random_name", return_value="random-slug")
     @patch("euclid09.model.Project.to_json", return_value={})
+    @patch("os.replace")
     @patch("builtins.open", new_callable=mock_open)
-    def test_commit(self, mock_open, mock_to_json, mock_random_name):
+    def test_commit(self, mock_open, mock_replace, mock_to_json, mock_random_name):
         commit_id = self.git.commit(content=self.sample_content)
         self.assertEqual(len(self.git.commits), 1)
         self.assertEqual(self.git.head.commit_id, commit_id)
@@ -39,9 +40,10 @@ class GitTest(unittest.TestCase):
         
         # Ensure file was written
         filename = f"{self.root_dir}/{commit_id}.json"
-        mock_open.assert_called_once_with(filename, "w")
+        mock_open.assert_called_once_with(f"{filename}.tmp", "wb")
         handle = mock_open()
-        handle.write.assert_called_once_with(json.dumps({}, indent=2))
+        handle.write.assert_called_once_with(b"{}")
+        mock_replace.assert_called_once_with(f"{filename}.tmp", filename)
 
     def unique_slug_generator():
         for i in itertools.count(1):
@@ -88,14 +90,178 @@ class GitTest(unittest.TestCase):
         self.assertEqual(self.git.head_index, 0)
 
     @patch("os.listdir", return_value=["2024-11-10-12-30-00-random-slug.json"])
-    @patch("builtins.open", new_callable=mock_open, read_data=json.dumps({"tracks": []}))
+    @patch("builtins.open", new_callable=mock_open, read_data=json.dumps({"tracks": []}).encode())
     def test_fetch(self, mock_open, mock_listdir):
         with patch.object(Project, "from_json", return_value=self.sample_content) as mock_from_json:
             self.git.fetch()
             self.assertEqual(len(self.git.commits), 1)
             self.assertEqual(self.git.head_index, 0)
+            self.assertEqual(str(self.git.head.commit_id), "2024-11-10-12-30-00-random-slug")
+            mock_from_json.assert_not_called()
+            mock_open.assert_not_called()
+            self.assertIs(self.git.head.content, self.sample_content)
+            self.assertIs(self.git.head.content, self.sample_content)
             mock_from_json.assert_called_once()
-            mock_open.assert_called_once_with(f"{self.root_dir}/2024-11-10-12-30-00-random-slug.json", "r")
+            mock_open.assert_called_once_with(f"{self.root_dir}/2024-11-10-12-30-00-random-slug.json", "rb")
+
+    @patch("os.listdir", return_value=["2024-11-10-12-30-00-first-slug.json",
+                                       "2024-11-10-12-30-01-second-slug.json"])
+    @patch("builtins.open", new_callable=mock_open, read_data=json.dumps({"tracks": []}).encode())
+    def test_fetch_cache_eviction(self, mock_open, mock_listdir):
+        git = Git(root=self.root_dir, cache_size=1)
+        with patch.object(Project, "from_json", side_effect=lambda _: Project()) as mock_from_json:
+            git.fetch()
+            first, second = git.commits
+            first.content
+            second.content
+            self.assertEqual(len(git.cache), 1)
+            first.content
+            self.assertEqual(mock_from_json.call_count, 3)
+
+class StoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root_dir = "tmp/mock_store"
+        if os.path.exists(self.root_dir):
+            shutil.rmtree(self.root_dir)
+
+    def tearDown(self):
+        if os.path.exists(self.root_dir):
+            shutil.rmtree(self.root_dir)
+
+    def test_log_store_roundtrip(self):
+        store = LogStore(root=self.root_dir)
+        store.put("2024-11-10-12-30-00-first-slug", {"patches": [1]})
+        store.put("2024-11-10-12-30-01-second-slug", {"patches": [2]})
+        reopened = LogStore(root=self.root_dir)
+        self.assertEqual(reopened.keys(), ["2024-11-10-12-30-00-first-slug",
+                                           "2024-11-10-12-30-01-second-slug"])
+        self.assertEqual(reopened.get("2024-11-10-12-30-01-second-slug"), {"patches": [2]})
+
+    def test_log_store_truncates_partial_entry(self):
+        store = LogStore(root=self.root_dir)
+        store.put("2024-11-10-12-30-00-first-slug", {"patches": [1]})
+        with open(store.path, "ab") as file:
+            file.write(b"2024-11-10-12-30-01-second-slug\t{\"patc")
+        reopened = LogStore(root=self.root_dir)
+        self.assertEqual(reopened.keys(), ["2024-11-10-12-30-00-first-slug"])
+        reopened.put("2024-11-10-12-30-02-third-slug", {"patches": [3]})
+        self.assertEqual(LogStore(root=self.root_dir).get("2024-11-10-12-30-02-third-slug"), {"patches": [3]})
+
+    def test_log_store_keys_are_sorted(self):
+        store = LogStore(root=self.root_dir)
+        store.put("2024-12-01-12-30-00-new-one", {"patches": [2]})
+        store.put("2024-11-01-12-30-00-old-one", {"patches": [1]})
+        self.assertEqual(LogStore(root=self.root_dir).keys(), ["2024-11-01-12-30-00-old-one",
+                                                               "2024-12-01-12-30-00-new-one"])
+
+    def test_dir_store_put_is_atomic(self):
+        store = DirStore(root=self.root_dir)
+        store.put("2024-11-10-12-30-00-first-slug", {"patches": [1]})
+        with patch("os.replace", side_effect=OSError("interrupted")):
+            with self.assertRaises(OSError):
+                store.put("2024-11-10-12-30-00-first-slug", {"patches": [2]})
+            with self.assertRaises(OSError):
+                store.put("2024-11-10-12-30-01-second-slug", {"patches": [3]})
+        reopened = DirStore(root=self.root_dir)
+        self.assertEqual(reopened.keys(), ["2024-11-10-12-30-00-first-slug"])
+        self.assertEqual(reopened.get("2024-11-10-12-30-00-first-slug"), {"patches": [1]})
+
+    def test_log_store_put_many(self):
+        store = LogStore(root=self.root_dir)
+        store.put("2024-11-10-12-30-00-first-slug", {"patches": [1]})
+        store.put_many([("2024-11-10-12-30-01-second-slug", {"patches": [2]}),
+                        ("2024-11-10-12-30-02-third-slug", {"patches": [3]})])
+        self.assertEqual(store.get("2024-11-10-12-30-02-third-slug"), {"patches": [3]})
+        reopened = LogStore(root=self.root_dir)
+        self.assertEqual([reopened.get(key) for key in reopened.keys()],
+                         [{"patches": [1]}, {"patches": [2]}, {"patches": [3]}])
+
+    def test_shared_store_batches_blobs(self):
+        store = SharedStore(LogStore(root=self.root_dir))
+        tracks = [{"name": name} for name in ["kick", "clap", "hat"]]
+        with patch.object(store.blobs, "put_many", wraps=store.blobs.put_many) as mock_put_many:
+            store.put("2024-11-10-12-30-00-first-slug", {"patches": [{"tracks": tracks, "frozen": False}]})
+            store.put("2024-11-10-12-30-01-second-slug", {"patches": [{"tracks": tracks, "frozen": False}]})
+        mock_put_many.assert_called_once()
+        self.assertEqual(len(mock_put_many.call_args[0][0]), 3)
+
+    def test_migrate_store(self):
+        src = DirStore(root=self.root_dir)
+        src.put("2024-11-10-12-30-00-first-slug", {"patches": [1]})
+        src.put("2024-11-10-12-30-01-second-slug", {"patches": [2]})
+        dest = LogStore(root=self.root_dir)
+        self.assertEqual(migrate_store(src, dest), 2)
+        self.assertEqual(migrate_store(src, dest), 0)
+        self.assertEqual(dest.keys(), src.keys())
+
+    def test_shared_store_shares_unchanged_tracks(self):
+        store = SharedStore(DirStore(root=self.root_dir))
+        kick, clap, hat = [{"name": name, "seeds": {"beat": i}} for i, name in enumerate(["kick", "clap", "hat"])]
+        first = {"patches": [{"tracks": [kick, clap], "frozen": False}]}
+        second = {"patches": [{"tracks": [kick, hat], "frozen": True}]}
+        store.put("2024-11-10-12-30-00-first-slug", first)
+        store.put("2024-11-10-12-30-01-second-slug", second)
+        self.assertEqual(len(store.blobs.keys()), 3)
+        reopened = SharedStore(DirStore(root=self.root_dir))
+        self.assertEqual(reopened.get("2024-11-10-12-30-00-first-slug"), first)
+        self.assertEqual(reopened.get("2024-11-10-12-30-01-second-slug"), second)
+        self.assertIs(reopened.get("2024-11-10-12-30-00-first-slug")["patches"][0]["tracks"][0],
+                      reopened.get("2024-11-10-12-30-01-second-slug")["patches"][0]["tracks"][0])
+
+    def test_shared_store_blob_cache_is_bounded(self):
+        store = SharedStore(DirStore(root=self.root_dir), cache_size=2)
+        for i, name in enumerate(["kick", "clap", "hat"]):
+            store.put(f"2024-11-10-12-30-0{i}-{name}-slug", {"patches": [{"tracks": [{"name": name}], "frozen": False}]})
+        reopened = SharedStore(DirStore(root=self.root_dir), cache_size=2)
+        for key in reopened.keys():
+            reopened.get(key)
+        self.assertEqual(len(reopened.blob_cache), 2)
+        self.assertEqual(reopened.get("2024-11-10-12-30-00-kick-slug")["patches"][0]["tracks"], [{"name": "kick"}])
+
+    def test_shared_store_reads_full_entries(self):
+        full = {"patches": [{"tracks": [{"name": "kick"}], "frozen": False}]}
+        DirStore(root=self.root_dir).put("2024-11-10-12-30-00-first-slug", full)
+        store = SharedStore(DirStore(root=self.root_dir))
+        self.assertEqual(store.get("2024-11-10-12-30-00-first-slug"), full)
+
+    def test_dir_store_reads_indented_json(self):
+        store = DirStore(root=self.root_dir)
+        with open(store.file_path("2024-11-10-12-30-00-first-slug"), "w") as file:
+            file.write(json.dumps({"patches": [1]}, indent=2))
+        store.put("2024-11-10-12-30-01-second-slug", {"patches": [2]})
+        with open(store.file_path("2024-11-10-12-30-01-second-slug"), "rb") as file:
+            self.assertEqual(file.read(), b'{"patches":[2]}')
+        reopened = DirStore(root=self.root_dir)
+        self.assertEqual([reopened.get(key) for key in reopened.keys()],
+                         [{"patches": [1]}, {"patches": [2]}])
+
+    def test_codecs_roundtrip(self):
+        struct = {"patches": [{"tracks": [{"name": "kick", "seeds": {"beat": 1}}], "frozen": False}]}
+        for name, codec in Codecs.items():
+            root_dir = os.path.join(self.root_dir, name)
+            DirStore(root=root_dir, codec=codec()).put("2024-11-10-12-30-00-first-slug", struct)
+            reopened = DirStore(root=root_dir, codec=Codecs["json"]())
+            self.assertEqual(reopened.keys(), ["2024-11-10-12-30-00-first-slug"])
+            self.assertEqual(reopened.get("2024-11-10-12-30-00-first-slug"), struct)
+
+    def test_log_store_rejects_binary_codec(self):
+        if "msgpack" not in Codecs:
+            self.skipTest("msgpack not installed")
+        with self.assertRaises(RuntimeError):
+            LogStore(root=self.root_dir, codec=Codecs["msgpack"]())
+
+    @patch("euclid09.git.random_name", return_value="random-slug")
+    def test_git_with_log_store(self, mock_random_name):
+        git = Git(root=self.root_dir, store=LogStore(root=self.root_dir))
+        with patch.object(Project, "to_json", return_value={"patches": []}):
+            commit_id = git.commit(content=Project())
+        fetched = Git(root=self.root_dir, store=LogStore(root=self.root_dir))
+        fetched.fetch()
+        self.assertEqual(str(fetched.head.commit_id), str(commit_id))
+        with patch.object(Project, "from_json", return_value=Project()) as mock_from_json:
+            fetched.head.content
+            mock_from_json.assert_called_once_with({"patches": []})
 
 if __name__ == "__main__":
     unittest.main()
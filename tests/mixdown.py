@@ -0,0 +1,52 @@
+from euclid09.cli.mixdown import mixdown_stems, np, pcm_error, read_pcm
+
+import io
+import unittest
+import wave
+
+def pcm_wav(samples, sampwidth=2, framerate=44100):
+    wav_io = io.BytesIO()
+    with wave.open(wav_io, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(sampwidth)
+        wav_file.setframerate(framerate)
+        wav_file.writeframes(np.array(samples, dtype={2: "<i2", 4: "<i4"}[sampwidth]).tobytes())
+    wav_io.seek(0)
+    return wav_io
+
+def pcm_samples(wav_io):
+    return read_pcm(wav_io)[1].tolist()
+
+@unittest.skipIf(np is None, "numpy not installed")
+class MixdownTest(unittest.TestCase):
+
+    def test_mix_and_mutes(self):
+        solos = [[100, -200, 300], [10, 20, -30], [-1, 2, 3]]
+        stems = mixdown_stems([pcm_wav(solo) for solo in solos])
+        self.assertEqual(pcm_samples(stems["mix"]), [109, -178, 273])
+        self.assertEqual([pcm_samples(solo) for solo in stems["solos"]], solos)
+        self.assertEqual([pcm_samples(mute) for mute in stems["mutes"]],
+                         [[9, 22, -27], [99, -198, 303], [110, -180, 270]])
+
+    def test_mix_clips_at_full_scale(self):
+        stems = mixdown_stems([pcm_wav([30000, -30000, 1]), pcm_wav([30000, -30000, 1])])
+        self.assertEqual(pcm_samples(stems["mix"]), [32767, -32768, 2])
+        self.assertEqual(pcm_samples(stems["mutes"][0]), [30000, -30000, 1])
+
+    def test_unequal_lengths(self):
+        stems = mixdown_stems([pcm_wav([1, 2, 3, 4]), pcm_wav([10, 20])])
+        self.assertEqual(pcm_samples(stems["mix"]), [11, 22, 3, 4])
+        self.assertEqual(pcm_samples(stems["solos"][1]), [10, 20, 0, 0])
+        self.assertEqual(pcm_samples(stems["mutes"][1]), [1, 2, 3, 4])
+
+    def test_mismatched_formats(self):
+        with self.assertRaises(RuntimeError):
+            mixdown_stems([pcm_wav([1, 2]), pcm_wav([1, 2], sampwidth=4)])
+
+    def test_pcm_error(self):
+        self.assertEqual(pcm_error(pcm_wav([1, 2, 3]), pcm_wav([1, 2, 3])), 0)
+        self.assertAlmostEqual(pcm_error(pcm_wav([0, 0, 0]), pcm_wav([0, 32767, 0])), 1)
+        self.assertAlmostEqual(pcm_error(pcm_wav([100, 100]), pcm_wav([100, 100, 327])), 327 / 32767)
+
+if __name__ == "__main__":
+    unittest.main()
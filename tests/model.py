@@ -5,6 +5,7 @@ from euclid09.model import *
 
 from unittest.mock import Mock, patch
 
+import random
 import unittest
 
 class ModelTest(unittest.TestCase):
@@ -259,6 +260,121 @@ class ModelTest(unittest.TestCase):
                                    n_ticks = 16)
         self.assertIsNotNone(container)
 
+    def test_track_hash(self):
+        track = Track.randomise(track=self.tracks[0],
+                                sounds=self.sounds,
+                                n_sounds=2)
+        track.sounds = self.mock_sounds
+        clone = track.clone()
+        self.assertEqual(track.hash, clone.hash)
+        clone.mutate_seeds()
+        self.assertNotEqual(track.hash, clone.hash)
+
+    def test_spec_interning(self):
+        track = Track.randomise(track=self.tracks[0],
+                                sounds=self.sounds,
+                                n_sounds=2)
+        track.sounds = self.mock_sounds
+        struct = json.loads(json.dumps(track.to_json()))
+        t1, t2 = Track.from_json(struct), Track.from_json(struct)
+        self.assertIs(t1.pattern, t2.pattern)
+        self.assertIs(t1.groove, t2.groove)
+        self.assertEqual(t1.pattern, struct["pattern"])
+        self.assertEqual(t1.to_json()["pattern"], struct["pattern"])
+        self.assertEqual(json.loads(json.dumps(t1.to_json()))["groove"], struct["groove"])
+        with self.assertRaises(TypeError):
+            t1.pattern["fn"] = "random"
+        with self.assertRaises(AttributeError):
+            t1.colour = "red"
+
+    def test_loaded_sounds_are_not_shared(self):
+        track = Track.randomise(track=self.tracks[0],
+                                sounds=self.sounds,
+                                n_sounds=2)
+        track.sounds = [DetroitSound(**{**self.mock_sample, "tags": [["kick", "bd"], {"bank": ["drums"]}]})]
+        struct = json.loads(json.dumps(track.to_json()))
+        t1, t2 = Track.from_json(struct), Track.from_json(struct)
+        self.assertIs(t1.sounds[0], t2.sounds[0])
+        with self.assertRaises(TypeError):
+            t1.sounds[0]["note"] = 40
+        m1, m2 = [track.init_machine(Mock(), [127, 127, 127]) for track in [t1, t2]]
+        self.assertIsNot(m1.sounds[0], m2.sounds[0])
+        m1.sounds[0].note = 40
+        m1.sounds[0].tags[0].append("909")
+        self.assertEqual(m2.sounds[0].as_dict(), struct["sounds"][0])
+        self.assertEqual(t1.to_json(), struct)
+        self.assertEqual(t2.to_json(), struct)
+
+    def test_project_randomise_seeded(self):
+        def randomise(seed):
+            rand = random.Random(seed)
+            project = Project.randomise(tracks=self.tracks,
+                                        sounds={name: list(pool) for name, pool in self.sounds.items()},
+                                        n_sounds=2,
+                                        n_patches=2,
+                                        rand=rand)
+            for patch in project.patches:
+                for track in patch.tracks:
+                    track.sounds = self.mock_sounds
+            for _ in range(4):
+                project.patches[0].mutate_attr(attr=rand.choice(["pattern", "groove", "seeds", "temperature"]),
+                                               rand=rand)
+            return project.to_json()
+        self.assertEqual(randomise(1), randomise(1))
+        self.assertNotEqual(randomise(1), randomise(2))
+
+    def test_project_clone_copy_on_write(self):
+        project = Project.randomise(tracks=self.tracks,
+                                    sounds=self.sounds,
+                                    n_sounds=2,
+                                    n_patches=2)
+        for patch in project.patches:
+            for track in patch.tracks:
+                track.sounds = self.mock_sounds
+        struct = project.to_json()
+        clone = project.clone()
+        for p1, p2 in zip(project.patches, clone.patches):
+            for t1, t2 in zip(p1.tracks, p2.tracks):
+                self.assertIs(t1, t2)
+        clone.patches[0].mutate_attr(attr="seeds")
+        clone.patches[0].mutate_attr(attr="sounds", sounds={track["name"]: self.mock_sounds
+                                                            for track in self.tracks})
+        self.assertEqual(project.to_json(), struct)
+        shared = [t1 is t2 for t1, t2 in zip(project.patches[0].tracks, clone.patches[0].tracks)]
+        self.assertIn(False, shared)
+        for t1, t2 in zip(project.patches[1].tracks, clone.patches[1].tracks):
+            self.assertIs(t1, t2)
+
+    def test_project_render_cache(self):
+        project = Project.randomise(tracks=self.tracks,
+                                    sounds=self.sounds,
+                                    n_sounds=2,
+                                    n_patches=2)
+        for patch in project.patches:
+            for track in patch.tracks:
+                track.sounds = self.mock_sounds
+        calls = []
+        def mock_generator(machine, *args, **kwargs):
+            calls.append(machine)
+            yield 0, SVMachineTrigs([])
+        cache = RenderCache()
+        for i in range(2):
+            project.render(banks = Mock(),
+                           generators = [mock_generator],
+                           bpm = 120,
+                           tpb = 1,
+                           n_ticks = 16,
+                           cache = cache)
+        self.assertEqual(len(calls), 4)
+        project.patches[0].tracks[0].mutate_seeds()
+        project.render(banks = Mock(),
+                       generators = [mock_generator],
+                       bpm = 120,
+                       tpb = 1,
+                       n_ticks = 16,
+                       cache = cache)
+        self.assertEqual(len(calls), 5)
+
     def test_patches_freeze(self):
         patches = Patches.randomise(tracks=self.tracks,
                                     sounds=self.sounds,
@@ -2,6 +2,7 @@ from euclid09.parse import *
 
 from unittest.mock import Mock
 
+import itertools
 import unittest
 
 class ParseTest(unittest.TestCase):
@@ -12,6 +13,35 @@ class ParseTest(unittest.TestCase):
         self.assertTrue(is_abbrev("N", "New York"))
         self.assertFalse(is_abbrev("LAX", "Los Angeles"))
 
+    def test_is_abbrev_matches_backtracking(self):
+        def backtracking_is_abbrev(abbrev, text):
+            abbrev=abbrev.lower()
+            text=text.lower()
+            words=text.split()
+            if not abbrev:
+                return True
+            if abbrev and not text:
+                return False
+            if abbrev[0]!=text[0]:
+                return False
+            else:
+                return (backtracking_is_abbrev(abbrev[1:],' '.join(words[1:])) or
+                        any(backtracking_is_abbrev(abbrev[1:],text[i+1:])
+                            for i in range(len(words[0]))))
+        texts = ["new york", "los angeles", "kick-bass", "snare clap", "aa ab ba", "", "a"]
+        for n in range(4):
+            for chars in itertools.product("abnky-", repeat=n):
+                abbrev = "".join(chars)
+                for text in texts:
+                    self.assertEqual(is_abbrev(abbrev, text),
+                                     backtracking_is_abbrev(abbrev, text),
+                                     (abbrev, text))
+
+    def test_is_abbrev_long_inputs(self):
+        self.assertFalse(is_abbrev("kb" * 64 + "x", "kickbass" * 64))
+        self.assertTrue(is_abbrev("kb" * 64, "kickbass" * 64))
+        self.assertTrue(is_abbrev("sc" * 256, " ".join(["snare clap"] * 256)))
+
     def test_matches_number(self):
         self.assertTrue(matches_number("123"))
         self.assertTrue(matches_number("123.456"))
@@ -75,5 +105,29 @@ class ParseTest(unittest.TestCase):
             sample_function(instance, "")
             self.assertIn("Please enter n", log.output[0])
 
+    def test_parse_line_unsupported_type(self):
+        with self.assertRaises(RuntimeError):
+            parse_line([{"name": "n", "type": "complex"}])
+
+    def test_parse_line_optional_items(self):
+        @parse_line([{"name": "n", "type": "int"},
+                     {"name": "mode", "type": "enum", "options": ["render", "mixdown"], "default": "ren"},
+                     {"name": "I", "type": "hexstr", "default": None}])
+        def sample_function(self, n, mode, I):
+            return n, mode, I
+        instance = Mock()
+        self.assertEqual(sample_function(instance, "5"), (5, "render", None))
+        self.assertEqual(sample_function(instance, "5 mix 0f"), (5, "mixdown", [0, 15]))
+        with self.assertLogs(level="ERROR") as log:
+            sample_function(instance, "5 warning")
+            self.assertIn("mode is invalid", log.output[0])
+
+    def test_parse_line_invalid_default(self):
+        with self.assertRaises(RuntimeError):
+            parse_line([{"name": "mode", "type": "enum", "options": ["render"], "default": "mixdown"}])
+        with self.assertRaises(RuntimeError):
+            parse_line([{"name": "n", "type": "int", "default": "1"},
+                        {"name": "m", "type": "int"}])
+
 if __name__ == "__main__":
     unittest.main()
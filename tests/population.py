@@ -0,0 +1,56 @@
+from euclid09.cli.population import Population, Worker
+from euclid09.generators import Beat, GhostEcho
+
+from tests.fixtures import detroit_sounds, detroit_tracks
+
+import random
+import unittest
+
+class PopulationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tracks = detroit_tracks()
+        self.sounds = detroit_sounds(self.tracks)
+
+    def population(self, n_jobs, seed=1):
+        return Population(tracks=self.tracks,
+                          banks=None,
+                          generators=[Beat, GhostEcho],
+                          bpm=120,
+                          tpb=1,
+                          n_ticks=16,
+                          n_jobs=n_jobs,
+                          cache=None,
+                          rand=random.Random(seed))
+
+    def test_randomise_is_independent_of_n_jobs(self):
+        projects = [self.population(n_jobs).randomise(sounds=self.sounds,
+                                                      n_patches=4)
+                    for n_jobs in [1, 2]]
+        self.assertEqual(projects[0].to_json(), projects[1].to_json())
+
+    def test_mutate_is_independent_of_n_jobs(self):
+        root = self.population(1, seed=2).randomise(sounds=self.sounds,
+                                                    n_patches=4)
+        root.freeze_patches(1)
+        for attrs, sounds in [(["pattern", "seeds"], None),
+                              (["sounds"], self.sounds)]:
+            projects = [self.population(n_jobs).mutate(project=root,
+                                                       attrs=attrs,
+                                                       n=2,
+                                                       sounds=sounds)
+                        for n_jobs in [1, 2]]
+            self.assertEqual(projects[0].to_json(), projects[1].to_json())
+            self.assertNotEqual(projects[0].to_json(), root.to_json())
+            self.assertEqual(projects[0].patches[0].to_json(), root.patches[0].to_json())
+
+    def test_serial_run_leaves_worker_state_alone(self):
+        project = self.population(1).randomise(sounds=self.sounds,
+                                               n_patches=2)
+        self.population(1).mutate(project=project,
+                                  attrs=["pattern"],
+                                  n=1)
+        self.assertEqual(Worker, {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+from euclid09.model import Track, spawn_pattern
+from euclid09.registry import Modules, machine_class, register_module, resolve_class, resolve_function, sound_class, validate_tracks
+
+import sv.algos.euclid as euclid
+
+from unittest.mock import patch
+
+import types
+import unittest
+
+class RegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        resolve_class.cache_clear()
+        self.tracks = [{"name": "mid",
+                        "machine": "sv.machines.beats.detroit.DetroitMachine",
+                        "temperature": 0.5,
+                        "density": 0.5}]
+
+    def test_resolve_class_is_cached(self):
+        with patch("euclid09.registry.load_class", side_effect=lambda path: object()) as mock_load_class:
+            klass = machine_class("sv.machines.beats.detroit.DetroitMachine")
+            self.assertIs(machine_class("sv.machines.beats.detroit.DetroitMachine"), klass)
+            sound_class("sv.machines.beats.detroit.DetroitMachine")
+            self.assertEqual(mock_load_class.call_count, 2)
+            mock_load_class.assert_called_with("sv.machines.beats.detroit.DetroitSound")
+
+    def test_resolve_class_invalid_path(self):
+        with self.assertRaises(RuntimeError):
+            resolve_class("sv.machines.beats.detroit.Detroit808Machine")
+        with self.assertRaises(RuntimeError):
+            resolve_class("sv.machines.nonexistent.DetroitMachine")
+
+    def test_validate_tracks(self):
+        validate_tracks(self.tracks)
+        with self.assertRaises(RuntimeError):
+            validate_tracks([{**self.tracks[0], "machine": "sv.machines.beats.detroit.Detroit808Machine"}])
+        with self.assertRaises(RuntimeError):
+            validate_tracks([{key: value for key, value in self.tracks[0].items()
+                              if key != "density"}])
+
+    def test_resolve_function(self):
+        self.assertIs(resolve_function("euclid", "bjorklund"), euclid.bjorklund)
+        with self.assertRaises(RuntimeError):
+            resolve_function("os", "system")
+        with self.assertRaises(RuntimeError):
+            resolve_function("euclid", "nonexistent")
+        with self.assertRaises(RuntimeError):
+            resolve_function("euclid", "__class__")
+
+    def test_register_module(self):
+        plugin = types.ModuleType("plugin")
+        plugin.swing = lambda rand, i: 1
+        register_module("plugin", plugin)
+        try:
+            self.assertIs(resolve_function("plugin", "swing"), plugin.swing)
+        finally:
+            Modules.pop("plugin")
+
+    def test_register_module_clears_pattern_cache(self):
+        for steps in [8, 16]:
+            plugin = types.ModuleType("plugin")
+            plugin.straight = lambda steps=steps: steps
+            register_module("plugin", plugin)
+            try:
+                self.assertEqual(spawn_pattern("plugin", "straight"), steps)
+            finally:
+                Modules.pop("plugin")
+
+    def test_from_json_rejects_unknown_spec(self):
+        track = {"name": "mid",
+                 "machine": "sv.machines.beats.detroit.DetroitMachine",
+                 "pattern": {"mod": "euclid", "fn": "bjorklund", "args": {"pulses": 3, "steps": 8}},
+                 "groove": {"mod": "perkons", "fn": "__import__"},
+                 "seeds": {},
+                 "temperature": 0.5,
+                 "density": 0.5,
+                 "sounds": []}
+        with self.assertRaises(RuntimeError):
+            Track.from_json(track)
+
+if __name__ == "__main__":
+    unittest.main()